@@ -39,6 +39,11 @@ kubectl wait --for=condition=Ready pod -l app=influxdb -n backend-comparison --t
 kubectl wait --for=condition=Ready pod -l app=grafana -n backend-comparison --timeout=300s
 
 echo "6️⃣ Deploying backends Python e Node.js..."
+# ConfigMap primeiro: o Job de migração usa a mesma configuração do backend
+kubectl apply -f "${CURRENT_DIR}/backends/python-backend.yaml" -l component=config
+kubectl delete job python-backend-migrate -n backend-comparison --ignore-not-found
+kubectl apply -f "${CURRENT_DIR}/backends/python-migrate.yaml"
+kubectl wait --for=condition=complete job/python-backend-migrate -n backend-comparison --timeout=300s
 kubectl apply -f "${CURRENT_DIR}/backends/python-backend.yaml"
 kubectl apply -f "${CURRENT_DIR}/backends/node-backend.yaml"
 
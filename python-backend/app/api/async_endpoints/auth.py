@@ -0,0 +1,67 @@
+from datetime import timedelta
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.api.dependencies import get_async_db
+from app.db.models import User
+from app.schemas.user import Token, User as UserSchema, UserCreate
+
+router = APIRouter()
+
+
+@router.post("/login", response_model=Token)
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
+    # bcrypt é CPU-bound: roda no executor dedicado, fora do event loop
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+    }
+
+
+@router.post("/register", response_model=UserSchema)
+async def create_user(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    user_in: UserCreate,
+) -> Any:
+    """
+    Create new user.
+    """
+    result = await db.execute(select(User).where(User.email == user_in.email))
+    if result.scalars().first():
+        raise HTTPException(
+            status_code=400,
+            detail="A user with this email already exists.",
+        )
+
+    user = User(
+        email=user_in.email,
+        hashed_password=await security.get_password_hash_async(user_in.password),
+        full_name=user_in.full_name,
+        is_active=True,
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
@@ -0,0 +1,111 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.bulk import (
+    batches, bulk_result, current_stock, inventory_deltas, inventory_results, parse_rows,
+    plan_inventory, upsert_inventory,
+)
+from app.api.dependencies import get_async_db, get_current_active_user_async, get_read_db_async
+from app.api.inventory_adjustment import add_stock, dialect_name, remove_stock, stock_of
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.db.models import InventoryItem, User
+from app.schemas.bulk import BulkResult
+from app.schemas.inventory import InventoryAdjustment, InventoryItem as InventoryItemSchema
+
+router = APIRouter(redirect_slashes=False)
+
+
+@router.get("/", response_model=List[InventoryItemSchema])
+async def read_inventory(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_async),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Retrieve inventory items.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
+    """
+    result = await db.execute(paginate(
+        select(InventoryItem).where(InventoryItem.product_id.isnot(None)),
+        InventoryItem.id, skip, limit, cursor,
+    ))
+    return list_response(page(result.scalars().all(), limit, response), InventoryItemSchema, response)
+
+
+@router.post("/add", response_model=InventoryItemSchema)
+async def add_to_inventory(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    adjustment: InventoryAdjustment,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Add items to inventory.
+    """
+    # Uma única instrução cria ou incrementa o estoque e devolve a linha atualizada
+    row = (await db.execute(
+        add_stock(dialect_name(db), adjustment.product_id, adjustment.quantity)
+    )).first()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Product not found")
+    await db.commit()
+    return row
+
+
+@router.post("/remove", response_model=InventoryItemSchema)
+async def remove_from_inventory(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    adjustment: InventoryAdjustment,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Remove items from inventory.
+    """
+    # Só decrementa se houver estoque suficiente; sem linha devolvida, descobre o motivo
+    row = (await db.execute(remove_stock(adjustment.product_id, adjustment.quantity))).first()
+    if row is None:
+        available = (await db.execute(stock_of(adjustment.product_id))).scalar()
+        await db.rollback()
+        if available is None:
+            raise HTTPException(status_code=404, detail="Product not in inventory")
+        raise HTTPException(status_code=400, detail="Not enough items in inventory")
+    await db.commit()
+    return row
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def adjust_inventory_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Apply many stock changes from a JSON array or an NDJSON body.
+
+    Each row's quantity is a delta (negative removes). Returns one result per row.
+    """
+    valid, failed = parse_rows(
+        await request.body(), request.headers.get("content-type", ""), InventoryAdjustment
+    )
+    results = list(failed)
+    for batch in batches(valid):
+        deltas = inventory_deltas(batch)
+        stock = dict((await db.execute(current_stock(list(deltas)))).all())
+        rows, errors = plan_inventory(deltas, stock)
+        updated = {}
+        if rows:
+            result = await db.execute(upsert_inventory(dialect_name(db), rows))
+            updated = {product_id: (id, quantity) for id, product_id, quantity in result}
+        await db.commit()
+        results += inventory_results(batch, updated, errors)
+    return bulk_result(results)
@@ -0,0 +1,129 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.api.dependencies import get_async_db, get_current_active_user_async, get_read_db_async
+from app.api.order_placement import (
+    allocate, decrement_stock, first_not_updated, lock_inventory, order_item_rows, order_total,
+    product_exists, requested_quantities,
+)
+from app.api.export import ExportFormat, MEDIA_TYPES, OrderExporter, content_disposition, stream_export_async
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.db.models import Order, OrderItem, User
+from app.schemas.order import Order as OrderSchema, OrderCreate
+
+router = APIRouter(redirect_slashes=False)
+
+# AsyncSession não permite lazy load: os itens são carregados junto com o
+# pedido, já sem os itens cujo produto foi removido
+_valid_items = selectinload(Order.items.and_(OrderItem.product_id.isnot(None)))
+
+
+@router.get("/", response_model=List[OrderSchema])
+async def read_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_async),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Retrieve orders.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
+    """
+    result = await db.execute(paginate(
+        select(Order).where(Order.customer_id == current_user.id).options(_valid_items),
+        Order.id, skip, limit, cursor,
+    ))
+    return list_response(page(result.scalars().all(), limit, response), OrderSchema, response)
+
+
+@router.post("/", response_model=OrderSchema)
+async def create_order(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    order_in: OrderCreate,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Create new order.
+    """
+    requested = requested_quantities(order_in)
+    # Uma transação: trava o estoque, valida, grava pedido/itens/estoque e faz um único commit
+    locked = (await db.execute(lock_inventory(list(requested)))).all()
+    allocation, short_product_id = allocate(requested, locked)
+    if short_product_id is not None:
+        exists = (await db.execute(product_exists(short_product_id))).first()
+        await db.rollback()
+        if not exists:
+            raise HTTPException(status_code=404, detail=f"Product {short_product_id} not found")
+        raise HTTPException(status_code=400, detail=f"Not enough items in inventory for product {short_product_id}")
+
+    order = Order(
+        customer_id=current_user.id,
+        status=order_in.status,
+        total_amount=order_total(order_in)
+    )
+    db.add(order)
+    await db.flush()
+    if allocation:
+        await db.execute(insert(OrderItem), order_item_rows(order.id, order_in))
+        updated = (await db.execute(decrement_stock(allocation))).scalars().all()
+        short_product_id = first_not_updated(allocation, updated)
+        if short_product_id is not None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail=f"Not enough items in inventory for product {short_product_id}")
+    await db.commit()
+
+    # Recarrega colunas com server_default (created_at/updated_at) e os itens
+    result = await db.execute(
+        select(Order)
+        .where(Order.id == order.id)
+        .options(_valid_items)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
+
+
+@router.get("/export")
+async def export_orders(
+    db: AsyncSession = Depends(get_read_db_async),
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Stream the current user's orders as NDJSON (with items) or CSV (one line per item).
+    """
+    return StreamingResponse(
+        stream_export_async(db, OrderExporter(format, current_user.id)),
+        media_type=MEDIA_TYPES[format],
+        headers=content_disposition("orders", format),
+    )
+
+
+@router.get("/{id}", response_model=OrderSchema)
+async def read_order(
+    *,
+    db: AsyncSession = Depends(get_read_db_async),
+    id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Get order by ID.
+    """
+    result = await db.execute(
+        select(Order).where(Order.id == id).options(_valid_items)
+    )
+    order = result.scalars().first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if order.customer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return order
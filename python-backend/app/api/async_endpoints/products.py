@@ -0,0 +1,188 @@
+from typing import Any, List, Optional
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.bulk import batches, bulk_result, insert_products, parse_rows, product_results, product_rows
+from app.api.dependencies import get_async_db, get_current_active_user_async, get_read_db_async
+from app.api.inventory_adjustment import dialect_name
+from app.api.export import ExportFormat, MEDIA_TYPES, ProductExporter, content_disposition, stream_export_async
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.core.cache import product_cache
+from app.db import read_routing
+from app.db.models import Product, User
+from app.schemas.bulk import BulkResult
+from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate
+
+router = APIRouter(redirect_slashes=False)
+logger = logging.getLogger(__name__)
+
+
+@router.get("/", response_model=List[ProductSchema])
+async def read_products(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_async),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Retrieve products.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
+    """
+    result = await db.execute(paginate(select(Product), Product.id, skip, limit, cursor))
+    products = result.scalars().all()
+    return list_response(page(products, limit, response), ProductSchema, response)
+
+
+@router.post("/", response_model=ProductSchema)
+async def create_product(
+    request: Request,
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    product_in: ProductCreate,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Create new product.
+    """
+    logger.info(f"Creating product: {product_in.dict()}")
+
+    try:
+        product = Product(
+            name=product_in.name,
+            description=product_in.description,
+            price=product_in.price,
+            sku=product_in.sku,
+            owner_id=current_user.id,
+        )
+
+        db.add(product)
+        await db.commit()
+        await db.refresh(product)
+        product_cache.invalidate(product.id)
+
+        return product
+    except Exception as e:
+        logger.error(f"Error creating product: {str(e)}")
+        raise
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_products_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Create many products from a JSON array or an NDJSON body.
+
+    Returns one result per row: invalid rows and duplicate SKUs fail on their own.
+    """
+    valid, failed = parse_rows(
+        await request.body(), request.headers.get("content-type", ""), ProductCreate
+    )
+    results = list(failed)
+    for batch in batches(valid):
+        rows, duplicates = product_rows(batch, current_user.id)
+        inserted = {}
+        if rows:
+            result = await db.execute(insert_products(dialect_name(db), rows))
+            inserted = {sku: id for id, sku in result}
+            await db.commit()
+        results += product_results(batch, inserted, duplicates)
+    return bulk_result(results)
+
+
+@router.get("/export")
+async def export_products(
+    db: AsyncSession = Depends(get_read_db_async),
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Stream every product as NDJSON or CSV.
+    """
+    return StreamingResponse(
+        stream_export_async(db, ProductExporter(format)),
+        media_type=MEDIA_TYPES[format],
+        headers=content_disposition("products", format),
+    )
+
+
+@router.get("/{id}", response_model=ProductSchema)
+async def read_product(
+    *,
+    db: AsyncSession = Depends(get_read_db_async),
+    id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Get product by ID.
+    """
+    # Read-through: o cache guarda o schema já serializável; escritas invalidam a entrada.
+    # Só leituras do primário o preenchem; quem escreveu há pouco lê direto do primário
+    if read_routing.reads_shared_cache(db):
+        cached = product_cache.get(id)
+        if cached is not None:
+            return cached
+    # Tomada antes da leitura: se um update invalidar a chave no meio, o valor lido não é guardado
+    generation = product_cache.generation(id)
+    product = await db.get(Product, id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    product_out = ProductSchema.from_orm(product)
+    if read_routing.fills_shared_cache(db):
+        product_cache.set(id, product_out, generation=generation)
+    return product_out
+
+
+@router.put("/{id}", response_model=ProductSchema)
+async def update_product(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    id: int,
+    product_in: ProductUpdate,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Update a product.
+    """
+    product = await db.get(Product, id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    update_data = product_in.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(product, field, value)
+
+    await db.commit()
+    product_cache.invalidate(id)
+    await db.refresh(product)
+    return product
+
+
+@router.delete("/{id}", response_model=ProductSchema)
+async def delete_product(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    id: int,
+    current_user: User = Depends(get_current_active_user_async),
+) -> Any:
+    """
+    Delete a product.
+    """
+    product = await db.get(Product, id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    await db.delete(product)
+    await db.commit()
+    product_cache.invalidate(id)
+    return product
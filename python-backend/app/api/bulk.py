@@ -0,0 +1,191 @@
+"""
+Bulk product creation and inventory adjustment (``POST .../bulk``).
+
+The body is either a JSON array or NDJSON (one JSON object per line, with
+``Content-Type: application/x-ndjson``). Rows are validated one by one, so
+a bad row is reported in the results instead of failing the whole request,
+and the valid ones are written ``BULK_BATCH_SIZE`` rows per multi-row
+statement, one commit per batch:
+
+- products: ``INSERT ... VALUES (...), (...) ON CONFLICT (sku) DO NOTHING
+  RETURNING id, sku``; rows missing from the result had a duplicate SKU.
+- inventory: one ``SELECT`` for the products of the batch and their stock,
+  then ``INSERT ... VALUES ... ON CONFLICT (product_id) DO UPDATE SET
+  quantity = quantity + excluded.quantity WHERE quantity + excluded.quantity
+  >= 0 RETURNING``; rows missing from the result did not have enough stock.
+  ``quantity`` is a delta: positive adds, negative removes. Rows for the
+  same product in one batch are applied together, as their sum.
+"""
+import json
+from typing import Dict, Iterator, List, Sequence, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Insert, Select, func, select
+
+from app.api.inventory_adjustment import dialect_insert, inventory_items
+from app.core.config import settings
+from app.db.models import Product
+from app.schemas.bulk import BulkResult, BulkRowResult
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+products = Product.__table__
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+def parse_rows(
+    body: bytes, content_type: str, schema: Type[BaseModel]
+) -> Tuple[List[Tuple[int, BaseModel]], List[BulkRowResult]]:
+    """Split the body into ``(index, row)`` pairs and per-row parse errors."""
+    failed: List[BulkRowResult] = []
+    raw: List[Tuple[int, object]] = []
+    if content_type.split(";")[0].strip().lower() in NDJSON_MEDIA_TYPES:
+        lines = [line for line in body.splitlines() if line.strip()]
+        for index, line in enumerate(lines):
+            try:
+                raw.append((index, json.loads(line)))
+            except ValueError as e:
+                failed.append(BulkRowResult(index=index, ok=False, detail=f"Invalid JSON: {e}"))
+    else:
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON")
+        raw = list(enumerate(data))
+    if len(raw) + len(failed) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.BULK_MAX_ROWS} rows per request"
+        )
+
+    valid: List[Tuple[int, BaseModel]] = []
+    for index, obj in raw:
+        try:
+            valid.append((index, schema.parse_obj(obj)))
+        except ValidationError as e:
+            failed.append(BulkRowResult(index=index, ok=False, detail=_validation_detail(e)))
+    return valid, failed
+
+
+def batches(rows: Sequence, size: int = None) -> Iterator[Sequence]:
+    size = size or settings.BULK_BATCH_SIZE
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bulk_result(results: List[BulkRowResult]) -> BulkResult:
+    results.sort(key=lambda result: result.index)
+    succeeded = sum(result.ok for result in results)
+    return BulkResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
+# Produtos
+
+def product_rows(
+    batch: Sequence[Tuple[int, BaseModel]], owner_id: int
+) -> Tuple[List[dict], List[BulkRowResult]]:
+    """Rows to insert, and errors for SKUs repeated within the batch."""
+    rows, failed, seen = [], [], set()
+    for index, product_in in batch:
+        if product_in.sku in seen:
+            failed.append(BulkRowResult(index=index, ok=False, detail="Duplicate SKU in request"))
+            continue
+        seen.add(product_in.sku)
+        rows.append(dict(product_in.dict(include={"name", "description", "price", "sku"}), owner_id=owner_id))
+    return rows, failed
+
+
+def insert_products(dialect_name: str, rows: List[dict]) -> Insert:
+    return (
+        dialect_insert(dialect_name)(products)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[products.c.sku])
+        .returning(products.c.id, products.c.sku)
+    )
+
+
+def product_results(
+    batch: Sequence[Tuple[int, BaseModel]], inserted: Dict[str, int], failed: List[BulkRowResult]
+) -> List[BulkRowResult]:
+    skipped = {result.index for result in failed}
+    results = list(failed)
+    for index, product_in in batch:
+        if index in skipped:
+            continue
+        if product_in.sku in inserted:
+            results.append(BulkRowResult(index=index, ok=True, id=inserted[product_in.sku]))
+        else:
+            results.append(BulkRowResult(
+                index=index, ok=False, detail="A product with this SKU already exists"
+            ))
+    return results
+
+
+# Estoque
+
+def inventory_deltas(batch: Sequence[Tuple[int, BaseModel]]) -> Dict[int, int]:
+    deltas: Dict[int, int] = {}
+    for _, adjustment in batch:
+        deltas[adjustment.product_id] = deltas.get(adjustment.product_id, 0) + adjustment.quantity
+    return deltas
+
+
+def current_stock(product_ids: Sequence[int]) -> Select:
+    return (
+        select(products.c.id, inventory_items.c.quantity)
+        .select_from(products.outerjoin(
+            inventory_items, inventory_items.c.product_id == products.c.id
+        ))
+        .where(products.c.id.in_(product_ids))
+    )
+
+
+def plan_inventory(
+    deltas: Dict[int, int], stock: Dict[int, object]
+) -> Tuple[List[dict], Dict[int, str]]:
+    """Upsert rows for the batch, and an error per product that cannot be adjusted."""
+    rows, errors = [], {}
+    for product_id, delta in deltas.items():
+        if product_id not in stock:
+            errors[product_id] = "Product not found"
+        elif stock[product_id] is None and delta < 0:
+            errors[product_id] = "Product not in inventory"
+        else:
+            rows.append({"product_id": product_id, "quantity": delta})
+    return rows, errors
+
+
+def upsert_inventory(dialect_name: str, rows: List[dict]) -> Insert:
+    stmt = dialect_insert(dialect_name)(inventory_items).values(rows)
+    new_quantity = inventory_items.c.quantity + stmt.excluded.quantity
+    return stmt.on_conflict_do_update(
+        index_elements=[inventory_items.c.product_id],
+        set_={"quantity": new_quantity, "last_updated": func.now()},
+        where=new_quantity >= 0,
+    ).returning(inventory_items.c.id, inventory_items.c.product_id, inventory_items.c.quantity)
+
+
+def inventory_results(
+    batch: Sequence[Tuple[int, BaseModel]], updated: Dict[int, tuple], errors: Dict[int, str]
+) -> List[BulkRowResult]:
+    results = []
+    for index, adjustment in batch:
+        product_id = adjustment.product_id
+        if product_id in updated:
+            inventory_id, quantity = updated[product_id]
+            results.append(BulkRowResult(
+                index=index, ok=True, id=inventory_id, product_id=product_id, quantity=quantity
+            ))
+        else:
+            results.append(BulkRowResult(
+                index=index, ok=False, product_id=product_id,
+                detail=errors.get(product_id, "Not enough items in inventory"),
+            ))
+    return results
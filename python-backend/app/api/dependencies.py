@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager, contextmanager
 from typing import Generator
+import hashlib
 import time
 from app.core.metrics import DB_QUERY_DURATION
 
@@ -6,20 +8,31 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
 from app.core import security
+from app.core.cache import detached_copy, token_cache, user_cache
 from app.core.config import settings
-from app.db.database import get_db as database_get_db, SessionLocal
+from app.db.database import (
+    async_replica_engines, get_async_db as database_get_async_db, get_async_replica_db,
+    get_db as database_get_db, get_replica_db, replica_engines, SessionLocal
+)
+from app.db import read_routing
+from app.core.metrics import DB_READ_ROUTING
 from app.db.models import User
 from app.schemas.user import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-def get_current_user(
-    db: Session = Depends(database_get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def _decode_token(token: str) -> TokenPayload:
+    # Tokens já verificados são reaproveitados até expirarem (claim exp)
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -30,9 +43,27 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    ttl = token_cache.ttl
+    if isinstance(payload.get("exp"), (int, float)):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(key, token_data, ttl=ttl)
+    return token_data
+
+
+def get_current_user(
+    db: Session = Depends(database_get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _decode_token(token)
+    # Quem escreve por esta sessão (guarda read-your-writes das réplicas)
+    db.info[read_routing.USER_ID] = token_data.sub
+    cached = user_cache.get(token_data.sub)
+    if cached is not None:
+        return db.merge(cached, load=False)
     user = db.query(User).filter(User.id == token_data.sub).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(user.id, detached_copy(user))
     return user
 
 
@@ -43,5 +74,89 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(database_get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _decode_token(token)
+    db.info[read_routing.USER_ID] = token_data.sub
+    cached = user_cache.get(token_data.sub)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+    result = await db.execute(select(User).where(User.id == token_data.sub))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(user.id, detached_copy(user))
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+def get_read_db(
+    db: Session = Depends(database_get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Generator:
+    """
+    Session for read-only handlers: a read replica, or the request's primary
+    session when there are no replicas or the user wrote recently.
+    """
+    if not replica_engines:
+        yield db
+        return
+    if read_routing.reads_from_primary(current_user.id):
+        DB_READ_ROUTING.labels(target="primary").inc()
+        db.info[read_routing.OWN_WRITES] = True
+        yield db
+        return
+    DB_READ_ROUTING.labels(target="replica").inc()
+    with contextmanager(get_replica_db)() as replica_db:
+        replica_db.info[read_routing.REPLICA] = True
+        yield replica_db
+
+
+async def get_read_db_async(
+    db: AsyncSession = Depends(database_get_async_db),
+    current_user: User = Depends(get_current_active_user_async),
+):
+    if not async_replica_engines:
+        yield db
+        return
+    if read_routing.reads_from_primary(current_user.id):
+        DB_READ_ROUTING.labels(target="primary").inc()
+        db.info[read_routing.OWN_WRITES] = True
+        yield db
+        return
+    DB_READ_ROUTING.labels(target="replica").inc()
+    async with asynccontextmanager(get_async_replica_db)() as replica_db:
+        replica_db.info[read_routing.REPLICA] = True
+        yield replica_db
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    # Invalida já no flush e de novo ao fim da transação: entre os dois, outra
+    # requisição pode ter lido (e cacheado) a versão anterior ao commit
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop("invalidated_users", ()):
+        user_cache.invalidate(user_id)
+
+
 # Use the existing get_db function from database module
 get_db = database_get_db
+get_async_db = database_get_async_db
@@ -4,6 +4,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core import security
 from app.core.config import settings
@@ -13,16 +14,21 @@ from app.schemas.user import Token, User as UserSchema, UserCreate
 
 router = APIRouter()
 
+# Handlers assíncronos: apenas a consulta ao banco ocupa uma thread do
+# threadpool; o bcrypt roda no executor dedicado de app.core.security
+
 
 @router.post("/login", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == form_data.username).first()
+    )
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -37,7 +43,7 @@ def login_access_token(
 
 
 @router.post("/register", response_model=UserSchema)
-def create_user(
+async def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: UserCreate,
@@ -45,7 +51,9 @@ def create_user(
     """
     Create new user.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == user_in.email).first()
+    )
     if user:
         raise HTTPException(
             status_code=400,
@@ -54,11 +62,15 @@ def create_user(
     
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.get_password_hash_async(user_in.password),
         full_name=user_in.full_name,
         is_active=True,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+
+    def save() -> None:
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+    await run_in_threadpool(save)
     return user
@@ -1,27 +1,45 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_current_active_user, get_db
-from app.db.models import InventoryItem, Product, User
+from app.api.bulk import (
+    batches, bulk_result, current_stock, inventory_deltas, inventory_results, parse_rows,
+    plan_inventory, upsert_inventory,
+)
+from app.api.dependencies import get_current_active_user, get_db, get_read_db
+from app.api.inventory_adjustment import add_stock, dialect_name, remove_stock, stock_of
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.core.profiling import ProfiledRoute
+from app.db.models import InventoryItem, User
+from app.schemas.bulk import BulkResult, BulkRowResult
 from app.schemas.inventory import InventoryAdjustment, InventoryItem as InventoryItemSchema
 
-router = APIRouter(redirect_slashes=False)
+router = APIRouter(redirect_slashes=False, route_class=ProfiledRoute)
 
 
 @router.get("/", response_model=List[InventoryItemSchema])
 def read_inventory(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve inventory items.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
     # Modificado para filtrar itens com product_id nulo
-    inventory = db.query(InventoryItem).filter(InventoryItem.product_id.isnot(None)).offset(skip).limit(limit).all()
+    inventory = paginate(
+        db.query(InventoryItem).filter(InventoryItem.product_id.isnot(None)),
+        InventoryItem.id, skip, limit, cursor,
+    ).all()
+    inventory = page(inventory, limit, response)
     
     # Verificação adicional para garantir que não haja valores nulos
     valid_inventory = []
@@ -29,7 +47,7 @@ def read_inventory(
         if item.product_id is not None:
             valid_inventory.append(item)
     
-    return valid_inventory
+    return list_response(valid_inventory, InventoryItemSchema, response)
 
 
 @router.post("/add", response_model=InventoryItemSchema)
@@ -42,30 +60,15 @@ def add_to_inventory(
     """
     Add items to inventory.
     """
-    # Ensure product exists
-    product = db.query(Product).filter(Product.id == adjustment.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Check if inventory item already exists
-    inventory_item = db.query(InventoryItem).filter(
-        InventoryItem.product_id == adjustment.product_id
+    # Uma única instrução cria ou incrementa o estoque e devolve a linha atualizada
+    row = db.execute(
+        add_stock(dialect_name(db), adjustment.product_id, adjustment.quantity)
     ).first()
-    
-    if inventory_item:
-        # Update existing inventory
-        inventory_item.quantity += adjustment.quantity
-    else:
-        # Create new inventory item
-        inventory_item = InventoryItem(
-            product_id=adjustment.product_id,
-            quantity=adjustment.quantity
-        )
-        db.add(inventory_item)
-    
+    if row is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Product not found")
     db.commit()
-    db.refresh(inventory_item)
-    return inventory_item
+    return row
 
 
 @router.post("/remove", response_model=InventoryItemSchema)
@@ -78,21 +81,46 @@ def remove_from_inventory(
     """
     Remove items from inventory.
     """
-    # Ensure inventory item exists
-    inventory_item = db.query(InventoryItem).filter(
-        InventoryItem.product_id == adjustment.product_id
-    ).first()
-    
-    if not inventory_item:
-        raise HTTPException(status_code=404, detail="Product not in inventory")
-    
-    # Check if we have enough items
-    if inventory_item.quantity < adjustment.quantity:
+    # Só decrementa se houver estoque suficiente; sem linha devolvida, descobre o motivo
+    row = db.execute(remove_stock(adjustment.product_id, adjustment.quantity)).first()
+    if row is None:
+        available = db.execute(stock_of(adjustment.product_id)).scalar()
+        db.rollback()
+        if available is None:
+            raise HTTPException(status_code=404, detail="Product not in inventory")
         raise HTTPException(status_code=400, detail="Not enough items in inventory")
-    
-    # Update inventory
-    inventory_item.quantity -= adjustment.quantity
-    
     db.commit()
-    db.refresh(inventory_item)
-    return inventory_item
+    return row
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def adjust_inventory_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Apply many stock changes from a JSON array or an NDJSON body.
+
+    Each row's quantity is a delta (negative removes). Returns one result per row.
+    """
+    valid, failed = parse_rows(
+        await request.body(), request.headers.get("content-type", ""), InventoryAdjustment
+    )
+
+    # A sessão síncrona roda no threadpool: um SELECT, um upsert multi-row e um commit por lote
+    def write() -> List[BulkRowResult]:
+        results = list(failed)
+        for batch in batches(valid):
+            deltas = inventory_deltas(batch)
+            stock = dict(db.execute(current_stock(list(deltas))).all())
+            rows, errors = plan_inventory(deltas, stock)
+            updated = {}
+            if rows:
+                result = db.execute(upsert_inventory(dialect_name(db), rows))
+                updated = {product_id: (id, quantity) for id, product_id, quantity in result}
+            db.commit()
+            results += inventory_results(batch, updated, errors)
+        return results
+
+    return bulk_result(await run_in_threadpool(write))
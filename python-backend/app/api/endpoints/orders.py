@@ -1,39 +1,49 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
 
-from app.api.dependencies import get_current_active_user, get_db
-from app.db.models import InventoryItem, Order, OrderItem, Product, User
+from app.api.dependencies import get_current_active_user, get_db, get_read_db
+from app.api.order_placement import (
+    allocate, decrement_stock, first_not_updated, lock_inventory, order_item_rows, order_total,
+    product_exists, requested_quantities,
+)
+from app.api.export import ExportFormat, MEDIA_TYPES, OrderExporter, content_disposition, stream_export
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.core.profiling import ProfiledRoute, sampled_iterator
+from app.db.models import Order, OrderItem, User
 from app.schemas.order import Order as OrderSchema, OrderCreate
 
-router = APIRouter(redirect_slashes=False)
+router = APIRouter(redirect_slashes=False, route_class=ProfiledRoute)
+
+# Itens carregados numa única query extra (IN com os ids dos pedidos), já sem
+# os itens cujo produto foi removido; o filtro fica no SQL e a coleção não é
+# alterada depois de carregada
+_valid_items = selectinload(Order.items.and_(OrderItem.product_id.isnot(None)))
 
 
 @router.get("/", response_model=List[OrderSchema])
 def read_orders(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve orders.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
-    orders = db.query(Order).filter(
-        Order.customer_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    
-    # Filter out order items with None product_id
-    for order in orders:
-        valid_items = []
-        for item in order.items:
-            if item.product_id is not None:
-                valid_items.append(item)
-        # Replace items list with filtered list
-        order.items = valid_items
-    
-    return orders
+    orders = paginate(
+        db.query(Order).filter(Order.customer_id == current_user.id).options(_valid_items),
+        Order.id, skip, limit, cursor,
+    ).all()
+    return list_response(page(orders, limit, response), OrderSchema, response)
 
 
 @router.post("/", response_model=OrderSchema)
@@ -46,78 +56,68 @@ def create_order(
     """
     Create new order.
     """
-    # Create order
+    requested = requested_quantities(order_in)
+    # Uma transação: trava o estoque, valida, grava pedido/itens/estoque e faz um único commit
+    locked = db.execute(lock_inventory(list(requested))).all()
+    allocation, short_product_id = allocate(requested, locked)
+    if short_product_id is not None:
+        exists = db.execute(product_exists(short_product_id)).first()
+        db.rollback()
+        if not exists:
+            raise HTTPException(status_code=404, detail=f"Product {short_product_id} not found")
+        raise HTTPException(status_code=400, detail=f"Not enough items in inventory for product {short_product_id}")
+
     order = Order(
         customer_id=current_user.id,
         status=order_in.status,
-        total_amount=0.0
+        total_amount=order_total(order_in)
     )
     db.add(order)
+    db.flush()
+    # O commit expira o pedido: ler order.id depois dele faria um SELECT de refresh
+    order_id = order.id
+    if allocation:
+        db.execute(insert(OrderItem), order_item_rows(order_id, order_in))
+        updated = db.execute(decrement_stock(allocation)).scalars().all()
+        short_product_id = first_not_updated(allocation, updated)
+        if short_product_id is not None:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"Not enough items in inventory for product {short_product_id}")
     db.commit()
-    db.refresh(order)
-    
-    # Calculate total and add order items
-    total_amount = 0.0
-    for item_data in order_in.items:
-        # Check product exists
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
-        if not product:
-            db.delete(order)
-            db.commit()
-            raise HTTPException(status_code=404, detail=f"Product {item_data.product_id} not found")
-        
-        # Check inventory
-        inventory = db.query(InventoryItem).filter(InventoryItem.product_id == item_data.product_id).first()
-        if not inventory or inventory.quantity < item_data.quantity:
-            db.delete(order)
-            db.commit()
-            raise HTTPException(status_code=400, detail=f"Not enough items in inventory for product {item_data.product_id}")
-        
-        # Create order item
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            unit_price=item_data.unit_price
-        )
-        db.add(order_item)
-        
-        # Update inventory
-        inventory.quantity -= item_data.quantity
-        
-        # Add to total
-        total_amount += item_data.quantity * item_data.unit_price
-    
-    # Update order total
-    order.total_amount = total_amount
-    
-    db.commit()
-    db.refresh(order)
-    return order
+
+    # Recarrega colunas com server_default (created_at/updated_at) e os itens
+    return db.query(Order).options(_valid_items).populate_existing().filter(Order.id == order_id).one()
+
+
+@router.get("/export")
+def export_orders(
+    db: Session = Depends(get_read_db),
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Stream the current user's orders as NDJSON (with items) or CSV (one line per item).
+    """
+    return StreamingResponse(
+        sampled_iterator(stream_export(db, OrderExporter(format, current_user.id))),
+        media_type=MEDIA_TYPES[format],
+        headers=content_disposition("orders", format),
+    )
 
 
 @router.get("/{id}", response_model=OrderSchema)
 def read_order(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get order by ID.
     """
-    order = db.query(Order).filter(Order.id == id).first()
+    order = db.query(Order).options(_valid_items).filter(Order.id == id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     if order.customer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    # Filter out order items with None product_id
-    valid_items = []
-    for item in order.items:
-        if item.product_id is not None:
-            valid_items.append(item)
-    # Replace items list with filtered list
-    order.items = valid_items
-    
     return order
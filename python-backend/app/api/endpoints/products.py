@@ -1,36 +1,46 @@
-from typing import Any, List
+from typing import Any, List, Optional
 import logging
 from prometheus_client import Histogram
-import time
-from app.core.metrics import DB_QUERY_DURATION
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_current_active_user, get_db
+from app.api.bulk import batches, bulk_result, insert_products, parse_rows, product_results, product_rows
+from app.api.dependencies import get_current_active_user, get_db, get_read_db
+from app.api.inventory_adjustment import dialect_name
+from app.api.export import ExportFormat, MEDIA_TYPES, ProductExporter, content_disposition, stream_export
+from app.api.pagination import page, paginate
+from app.api.responses import list_response
+from app.core.cache import product_cache
+from app.core.profiling import ProfiledRoute, sampled_iterator
+from app.db import read_routing
 from app.db.models import Product, User
+from app.schemas.bulk import BulkResult, BulkRowResult
 from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate
 
 # Modificar a configuração do router para desativar o redirecionamento de barra final
-router = APIRouter(redirect_slashes=False)
+router = APIRouter(redirect_slashes=False, route_class=ProfiledRoute)
 logger = logging.getLogger(__name__)
 
 
 @router.get("/", response_model=List[ProductSchema])
 def read_products(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve products.
+
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to get the next one.
     """
-    start_time = time.time()
-    products = db.query(Product).offset(skip).limit(limit).all()
-    duration = time.time() - start_time
-    DB_QUERY_DURATION.labels(operation='select').observe(duration)
-    return products
+    products = paginate(db.query(Product), Product.id, skip, limit, cursor).all()
+    return list_response(page(products, limit, response), ProductSchema, response)
 
 
 @router.post("/", response_model=ProductSchema)
@@ -58,12 +68,10 @@ async def create_product(
             owner_id=current_user.id,
         )
         
-        start_time = time.time()
         db.add(product)
         db.commit()
         db.refresh(product)
-        duration = time.time() - start_time
-        DB_QUERY_DURATION.labels(operation='insert').observe(duration)
+        product_cache.invalidate(product.id)
         
         return product
     except Exception as e:
@@ -71,20 +79,78 @@ async def create_product(
         raise
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def create_products_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create many products from a JSON array or an NDJSON body.
+
+    Returns one result per row: invalid rows and duplicate SKUs fail on their own.
+    """
+    valid, failed = parse_rows(
+        await request.body(), request.headers.get("content-type", ""), ProductCreate
+    )
+    owner_id = current_user.id
+
+    # A sessão síncrona roda no threadpool, um INSERT multi-row e um commit por lote
+    def write() -> List[BulkRowResult]:
+        results = list(failed)
+        for batch in batches(valid):
+            rows, duplicates = product_rows(batch, owner_id)
+            inserted = {}
+            if rows:
+                inserted = {sku: id for id, sku in db.execute(insert_products(dialect_name(db), rows))}
+                db.commit()
+            results += product_results(batch, inserted, duplicates)
+        return results
+
+    return bulk_result(await run_in_threadpool(write))
+
+
+@router.get("/export")
+def export_products(
+    db: Session = Depends(get_read_db),
+    format: ExportFormat = ExportFormat.ndjson,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Stream every product as NDJSON or CSV.
+    """
+    return StreamingResponse(
+        sampled_iterator(stream_export(db, ProductExporter(format))),
+        media_type=MEDIA_TYPES[format],
+        headers=content_disposition("products", format),
+    )
+
+
 @router.get("/{id}", response_model=ProductSchema)
 def read_product(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get product by ID.
     """
+    # Read-through: o cache guarda o schema já serializável; escritas invalidam a entrada.
+    # Só leituras do primário o preenchem; quem escreveu há pouco lê direto do primário
+    if read_routing.reads_shared_cache(db):
+        cached = product_cache.get(id)
+        if cached is not None:
+            return cached
+    # Tomada antes da leitura: se um update invalidar a chave no meio, o valor lido não é guardado
+    generation = product_cache.generation(id)
     product = db.query(Product).filter(Product.id == id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    product_out = ProductSchema.from_orm(product)
+    if read_routing.fills_shared_cache(db):
+        product_cache.set(id, product_out, generation=generation)
+    return product_out
 
 
 @router.put("/{id}", response_model=ProductSchema)
@@ -108,6 +174,7 @@ def update_product(
     
     db.add(product)
     db.commit()
+    product_cache.invalidate(id)
     db.refresh(product)
     return product
 
@@ -128,10 +195,5 @@ def delete_product(
     
     db.delete(product)
     db.commit()
-    return product
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    db.delete(product)
-    db.commit()
+    product_cache.invalidate(id)
     return product
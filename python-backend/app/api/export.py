@@ -0,0 +1,154 @@
+"""
+Streaming exports (``GET /products/export``, ``GET /orders/export``).
+
+Rows are read with a server-side cursor (``yield_per``; with psycopg2 and
+asyncpg that is a named/streaming cursor, not a fetch of the whole result),
+selected as plain columns instead of ORM entities, and rendered one batch
+of ``EXPORT_BATCH_SIZE`` rows per ``StreamingResponse`` chunk. Memory stays
+bounded by the batch size regardless of the table size.
+
+Formats: NDJSON (one JSON object per line, in the same shape as the read
+endpoints) and CSV (a header line, then one line per row; orders are
+flattened to one line per item).
+"""
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+import orjson
+from sqlalchemy import Select, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Order, OrderItem, Product
+from app.schemas.encoders import compile_encoder
+from app.schemas.order import Order as OrderSchema, OrderItem as OrderItemSchema
+from app.schemas.product import Product as ProductSchema
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+products = Product.__table__
+orders = Order.__table__
+order_items = OrderItem.__table__
+
+PRODUCT_COLUMNS = tuple(ProductSchema.__fields__)
+ORDER_COLUMNS = tuple(name for name in OrderSchema.__fields__ if name != "items")
+ITEM_COLUMNS = tuple(OrderItemSchema.__fields__)
+# Colunas do item no SELECT/CSV de pedidos, prefixadas para não colidir com as do pedido
+ITEM_LABELS = tuple(f"item_{name}" for name in ITEM_COLUMNS)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _csv_lines(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+class ProductExporter:
+    def __init__(self, format: ExportFormat) -> None:
+        self.format = format
+        self._encode = compile_encoder(ProductSchema)
+
+    def query(self) -> Select:
+        return select(*(products.c[name] for name in PRODUCT_COLUMNS)).order_by(products.c.id)
+
+    def header(self) -> bytes:
+        return _csv_lines([PRODUCT_COLUMNS]) if self.format == ExportFormat.csv else b""
+
+    def render(self, rows: Sequence) -> bytes:
+        if self.format == ExportFormat.csv:
+            return _csv_lines(rows)
+        return b"".join(orjson.dumps(self._encode(row)) + b"\n" for row in rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class OrderExporter:
+    """
+    Orders of one customer joined with their items (items without a product
+    are left out, as in the read endpoints), ordered by order and item id.
+    For NDJSON the rows of each order are grouped back into one object; an
+    order whose rows straddle two batches is emitted with the later batch.
+    """
+
+    def __init__(self, format: ExportFormat, customer_id: int) -> None:
+        self.format = format
+        self.customer_id = customer_id
+        self._current: Optional[dict] = None
+
+    def query(self) -> Select:
+        return (
+            select(
+                *(orders.c[name] for name in ORDER_COLUMNS),
+                *(order_items.c[name].label(label) for name, label in zip(ITEM_COLUMNS, ITEM_LABELS)),
+            )
+            .select_from(orders.outerjoin(order_items, and_(
+                order_items.c.order_id == orders.c.id, order_items.c.product_id.isnot(None)
+            )))
+            .where(orders.c.customer_id == self.customer_id)
+            .order_by(orders.c.id, order_items.c.id)
+        )
+
+    def header(self) -> bytes:
+        return _csv_lines([ORDER_COLUMNS + ITEM_LABELS]) if self.format == ExportFormat.csv else b""
+
+    def render(self, rows: Sequence) -> bytes:
+        if self.format == ExportFormat.csv:
+            return _csv_lines(rows)
+        lines = []
+        split = len(ORDER_COLUMNS)
+        for row in rows:
+            if self._current is None or self._current["id"] != row.id:
+                if self._current is not None:
+                    lines.append(orjson.dumps(self._current) + b"\n")
+                self._current = dict(zip(ORDER_COLUMNS, row[:split]), items=[])
+            if row.item_id is not None:
+                self._current["items"].append(dict(zip(ITEM_COLUMNS, row[split:])))
+        return b"".join(lines)
+
+    def finish(self) -> bytes:
+        if self.format == ExportFormat.csv or self._current is None:
+            return b""
+        line, self._current = orjson.dumps(self._current) + b"\n", None
+        return line
+
+
+def content_disposition(name: str, format: ExportFormat) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{format.value}"'}
+
+
+def stream_export(db: Session, exporter) -> Iterator[bytes]:
+    yield exporter.header()
+    result = db.execute(exporter.query().execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    for rows in result.partitions():
+        yield exporter.render(rows)
+    yield exporter.finish()
+
+
+async def stream_export_async(db: AsyncSession, exporter) -> AsyncIterator[bytes]:
+    yield exporter.header()
+    result = await db.stream(exporter.query().execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield exporter.render(rows)
+    yield exporter.finish()
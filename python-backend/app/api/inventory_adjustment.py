@@ -0,0 +1,71 @@
+"""
+Single-statement inventory adjustments shared by the sync and async endpoints.
+
+Each adjustment is one statement that changes the row in the database and
+returns it, so concurrent adjustments of the same product never read a
+quantity in Python and write it back (no lost updates), and there is no
+retry loop: the database serializes them on the row lock only for the
+duration of the statement.
+
+- add: ``INSERT ... SELECT FROM products ... ON CONFLICT (product_id) DO
+  UPDATE SET quantity = quantity + excluded.quantity RETURNING``; no row
+  returned means the product does not exist. Relies on the unique index on
+  ``inventory_items.product_id``.
+- remove: ``UPDATE ... SET quantity = quantity - :n WHERE product_id = :p
+  AND quantity >= :n RETURNING``; no row returned means the product is not
+  in inventory or there is not enough stock, told apart by ``stock_of``
+  only on that failure path.
+"""
+from typing import Any, Callable
+
+from sqlalchemy import Insert, Select, Update, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.models import InventoryItem, Product
+
+inventory_items = InventoryItem.__table__
+
+_dialect_inserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(dialect_name: str) -> Callable[..., Insert]:
+    """``insert()`` of the dialect, which supports ``on_conflict_do_*``."""
+    return _dialect_inserts[dialect_name]
+
+
+def add_stock(dialect_name: str, product_id: int, quantity: int) -> Insert:
+    stmt = dialect_insert(dialect_name)(inventory_items).from_select(
+        ["product_id", "quantity"],
+        select(Product.id, literal(quantity)).where(Product.id == product_id),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[inventory_items.c.product_id],
+        set_={
+            "quantity": inventory_items.c.quantity + stmt.excluded.quantity,
+            "last_updated": func.now(),
+        },
+    ).returning(*inventory_items.c)
+
+
+def remove_stock(product_id: int, quantity: int) -> Update:
+    return (
+        update(inventory_items)
+        .where(
+            inventory_items.c.product_id == product_id,
+            inventory_items.c.quantity >= quantity,
+        )
+        .values(quantity=inventory_items.c.quantity - quantity)
+        .returning(*inventory_items.c)
+    )
+
+
+def stock_of(product_id: int) -> Select:
+    return select(inventory_items.c.quantity).where(inventory_items.c.product_id == product_id)
+
+
+def dialect_name(db: Any) -> str:
+    """Dialect of the engine a ``Session``/``AsyncSession`` is bound to."""
+    return db.bind.dialect.name
@@ -0,0 +1,103 @@
+"""
+Set-based order placement shared by the sync and async order endpoints.
+
+An order is placed in a single transaction with a fixed number of
+statements regardless of how many items it has:
+
+1. the inventory rows of every requested product are read and locked with
+   ``SELECT ... FOR UPDATE`` (in id order, so concurrent orders touching
+   the same products lock them in the same order and cannot deadlock);
+2. the stock check runs against the locked quantities, so two concurrent
+   orders can no longer both see the same stock and oversell it;
+3. the order, its items (one multi-row insert) and the stock decrement
+   (one conditional ``UPDATE`` covering every product) are written and
+   committed once.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, Update, case, select, update
+
+from app.db.models import InventoryItem, Product
+from app.schemas.order import OrderCreate
+
+
+def requested_quantities(order_in: OrderCreate) -> Dict[int, int]:
+    """Total quantity per product, in the order products first appear."""
+    requested: Dict[int, int] = {}
+    for item in order_in.items:
+        requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
+    return requested
+
+
+def lock_inventory(product_ids: Sequence[int]) -> Select:
+    return (
+        select(InventoryItem.id, InventoryItem.product_id, InventoryItem.quantity)
+        .where(InventoryItem.product_id.in_(product_ids))
+        .order_by(InventoryItem.id)
+        .with_for_update()
+    )
+
+
+def product_exists(product_id: int) -> Select:
+    return select(Product.id).where(Product.id == product_id)
+
+
+def allocate(
+    requested: Dict[int, int], locked_rows: Sequence[Tuple[int, int, int]]
+) -> Tuple[Dict[int, Tuple[int, int]], Optional[int]]:
+    """
+    Match ``requested`` against the locked inventory rows.
+
+    Returns ``{product_id: (inventory_id, quantity)}`` and ``None``, or an
+    empty dict and the first product (in request order) without enough stock.
+    """
+    stock = {product_id: (inventory_id, available) for inventory_id, product_id, available in locked_rows}
+    allocation = {}
+    for product_id, quantity in requested.items():
+        inventory_id, available = stock.get(product_id, (None, 0))
+        if inventory_id is None or available < quantity:
+            return {}, product_id
+        allocation[product_id] = (inventory_id, quantity)
+    return allocation, None
+
+
+def decrement_stock(allocation: Dict[int, Tuple[int, int]]) -> Update:
+    """
+    One conditional ``UPDATE`` for every allocated row, returning the ids it
+    changed. ``quantity >= requested`` is checked by the database itself, so
+    stock cannot go negative even where ``FOR UPDATE`` is not supported
+    (SQLite); rows missing from the result ran out in the meantime.
+    """
+    quantities = {inventory_id: quantity for inventory_id, quantity in allocation.values()}
+    delta = case(quantities, value=InventoryItem.id)
+    return (
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(list(quantities)), InventoryItem.quantity >= delta)
+        .values(quantity=InventoryItem.quantity - delta)
+        .returning(InventoryItem.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def first_not_updated(allocation: Dict[int, Tuple[int, int]], updated_ids: Sequence[int]) -> Optional[int]:
+    updated = set(updated_ids)
+    for product_id, (inventory_id, _) in allocation.items():
+        if inventory_id not in updated:
+            return product_id
+    return None
+
+
+def order_item_rows(order_id: int, order_in: OrderCreate) -> List[dict]:
+    return [
+        {
+            "order_id": order_id,
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+        }
+        for item in order_in.items
+    ]
+
+
+def order_total(order_in: OrderCreate) -> float:
+    return sum(item.quantity * item.unit_price for item in order_in.items)
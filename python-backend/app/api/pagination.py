@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are ordered by primary key. The cursor is an opaque token holding the
+last id of the previous page, so the next page is fetched with
+``WHERE id > :last_id ORDER BY id LIMIT n`` and uses the primary key index
+no matter how deep the page is, unlike ``OFFSET``, which reads and discards
+every skipped row. ``skip`` keeps working for existing clients.
+
+The response body stays a plain list; the cursor of the next page is sent
+in the ``X-Next-Cursor`` header and is omitted on the last page.
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def paginate(query: Any, id_column: Any, skip: int, limit: int, cursor: Optional[str]) -> Any:
+    """
+    Apply ordering and paging to a ``Query`` or a ``select()``.
+
+    One extra row is requested so ``page`` can tell whether a next page
+    exists without a ``COUNT``.
+    """
+    query = query.order_by(id_column)
+    if cursor is not None:
+        if skip:
+            raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+        query = query.where(id_column > decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def page(items: List[Any], limit: int, response: Response) -> List[Any]:
+    """Trim the extra row fetched by ``paginate`` and set the next cursor."""
+    if len(items) > limit:
+        items = items[:limit]
+        if items:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1].id)
+    return items
@@ -0,0 +1,24 @@
+"""
+Opt-in fast JSON path for the list endpoints (FAST_JSON_RESPONSES).
+
+By default handlers return ORM objects and FastAPI validates them against
+the ``response_model``. With the setting on, ``list_response`` encodes the
+rows with the schema's precompiled encoder and returns an
+``ORJSONResponse``, which FastAPI sends as-is. ``response_model`` stays on
+the route, so the OpenAPI schema does not change.
+"""
+from typing import Any, Sequence, Type
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.schemas.encoders import encode_many
+
+
+def list_response(rows: Sequence[Any], schema: Type[BaseModel], response: Response) -> Any:
+    if not settings.FAST_JSON_RESPONSES:
+        return rows
+    # Uma Response devolvida pelo handler ignora os headers do parâmetro response
+    return ORJSONResponse(encode_many(schema, rows), headers=dict(response.headers))
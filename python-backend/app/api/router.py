@@ -1,6 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, inventory, orders, products
+from app.core.config import settings
+
+if settings.DATABASE_ASYNC:
+    from app.api.async_endpoints import auth, inventory, orders, products
+else:
+    from app.api.endpoints import auth, inventory, orders, products
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
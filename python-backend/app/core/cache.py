@@ -0,0 +1,141 @@
+"""
+In-process caches shared by the request handlers.
+
+Each cache is bounded (least recently used entries are evicted first) and
+entries expire after a TTL. Caches are per process: with several replicas
+or workers the TTL bounds how long a stale entry can be served.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.metrics import CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a default TTL per entry.
+
+    Read-through fills that race with writes take ``generation(key)`` before
+    loading the value and pass it to ``set``: when ``invalidate(key)`` ran
+    in between, the loaded value may predate the write and is not stored.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float, enabled: bool = True) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled and max_size > 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Geração de cada chave invalidada (valores de um contador global), limitada a
+        # max_size chaves; as descartadas sobem o piso, que vale para chaves sem geração
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._generation_floor = 0
+        self._counter = itertools.count(1)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    CACHE_HITS.labels(cache=self.name).inc()
+                    return value
+                del self._entries[key]
+                CACHE_EVICTIONS.labels(cache=self.name, reason='expired').inc()
+                CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+        CACHE_MISSES.labels(cache=self.name).inc()
+        return None
+
+    def generation(self, key: Hashable) -> int:
+        with self._lock:
+            return self._generations.get(key, self._generation_floor)
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None
+    ) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and self._generations.get(key, self._generation_floor) != generation:
+                # Invalidada durante a leitura: o valor pode ser anterior à escrita
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels(cache=self.name, reason='size').inc()
+            CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self.enabled:
+                self._generations[key] = next(self._counter)
+                self._generations.move_to_end(key)
+                while len(self._generations) > self.max_size:
+                    _, generation = self._generations.popitem(last=False)
+                    self._generation_floor = max(self._generation_floor, generation)
+            if self._entries.pop(key, None) is not None:
+                CACHE_EVICTIONS.labels(cache=self.name, reason='invalidated').inc()
+                CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            CACHE_ENTRIES.labels(cache=self.name).set(0)
+
+
+def detached_copy(instance: Any) -> Any:
+    """
+    Copy the column attributes of an ORM instance into a new detached one.
+
+    The copy is never attached to a session, so it can be shared between
+    requests; each request re-attaches it with ``session.merge(copy,
+    load=False)``, which emits no SQL.
+    """
+    mapper = inspect(instance).mapper
+    copy = mapper.class_(**{
+        attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+
+user_cache = TTLCache(
+    "user",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    enabled=settings.USER_CACHE_ENABLED,
+)
+
+token_cache = TTLCache(
+    "token",
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+    enabled=settings.TOKEN_CACHE_ENABLED,
+)
+
+product_cache = TTLCache(
+    "product",
+    max_size=settings.PRODUCT_CACHE_MAX_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+    enabled=settings.PRODUCT_CACHE_ENABLED,
+)
+
+# Usuários com escrita recente: suas leituras ficam no primário (read-your-writes)
+recent_writers = TTLCache(
+    "recent_writers",
+    max_size=settings.READ_YOUR_WRITES_MAX_SIZE,
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+)
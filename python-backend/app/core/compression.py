@@ -0,0 +1,245 @@
+"""
+Response compression (gzip, plus brotli and zstd when their packages are
+installed).
+
+``CompressionMiddleware`` negotiates the encoding from ``Accept-Encoding``
+in the server's preference order (``COMPRESSION_ENCODINGS``), then holds
+the response start until the first body chunk arrives:
+
+* single-chunk bodies smaller than ``COMPRESSION_MINIMUM_SIZE``, bodies
+  already encoded and non-text media types are sent untouched;
+* other single-chunk bodies are compressed in one call and get an exact
+  ``Content-Length``;
+* streamed bodies (``more_body``) are compressed chunk by chunk with a
+  sync flush after each one, so clients still receive every chunk as soon
+  as it is produced.
+
+Routes opt out with ``@skip_compression``: ``/metrics``, scraped over the
+cluster network, where compressing would only add CPU to the worker being
+measured (also useful for streams whose chunks are already small, where the
+per-chunk flush overhead outweighs the gain).
+The uncompressed size is left in the ASGI scope for ``PrometheusMiddleware``.
+"""
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import COMPRESSION_DURATION, COMPRESSION_RATIO
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+
+# Chave no scope ASGI com o tamanho do corpo antes da compressão
+RAW_RESPONSE_SIZE = "app.raw_response_size"
+
+_SKIP_ATTRIBUTE = "__skip_compression__"
+
+# Tipos de mídia que compensam comprimir (imagens, zip etc. já são comprimidos)
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/xml",
+    "application/javascript", "application/problem+json",
+)
+
+
+def skip_compression(endpoint: Callable) -> Callable:
+    """Mark a route endpoint whose responses must never be compressed."""
+    setattr(endpoint, _SKIP_ATTRIBUTE, True)
+    return endpoint
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31: formato gzip (cabeçalho + CRC), não zlib puro
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_compressors() -> Dict[str, Callable[[], object]]:
+    """Compressor factories by content-coding, for the installed packages only."""
+    compressors = {"gzip": lambda: _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)}
+    if brotli is not None:
+        compressors["br"] = lambda: _BrotliCompressor(settings.COMPRESSION_BROTLI_LEVEL)
+    if zstandard is not None:
+        compressors["zstd"] = lambda: _ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    return compressors
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """``Accept-Encoding`` as ``{coding: q}``; malformed q-values count as 0."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware that compresses responses, streamed ones included."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        encodings: Optional[str] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        compressors = available_compressors()
+        preference = encodings if encodings is not None else settings.COMPRESSION_ENCODINGS
+        # Ordem de preferência do servidor, só com os codecs instalados
+        self.compressors = {
+            coding: compressors[coding]
+            for coding in (name.strip().lower() for name in preference.split(","))
+            if coding in compressors
+        }
+
+    def negotiate(self, scope: Scope) -> Optional[str]:
+        header = Headers(scope=scope).get("accept-encoding")
+        if not header:
+            return None
+        accepted = parse_accept_encoding(header)
+        wildcard = accepted.get("*", 0.0)
+        for coding in self.compressors:
+            if accepted.get(coding, wildcard) > 0:
+                return coding
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        coding = self.negotiate(scope)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor = None
+        passthrough = False
+        raw_size = compressed_size = 0
+        elapsed = 0.0
+
+        def skipped(headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+            endpoint = getattr(scope.get("route"), "endpoint", None)
+            if getattr(endpoint, _SKIP_ATTRIBUTE, False):
+                return True
+            if "content-encoding" in headers or not _is_compressible(headers.get("content-type", "")):
+                return True
+            if not more_body:
+                return len(body) < self.minimum_size
+            # Stream com tamanho declarado: vale o mesmo limite
+            length = headers.get("content-length")
+            return length is not None and length.isdigit() and int(length) < self.minimum_size
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough, raw_size, compressed_size, elapsed
+            if message["type"] == "http.response.start":
+                # Adiado até o primeiro chunk: a decisão depende do corpo
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(scope=start_message)
+                if skipped(headers, body, more_body):
+                    passthrough = True
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                compressor = self.compressors[coding]()
+                del headers["content-length"]
+                headers["content-encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+
+            started = time.perf_counter()
+            data = compressor.compress(body)
+            data += compressor.flush() if more_body else compressor.finish()
+            elapsed += time.perf_counter() - started
+            raw_size += len(body)
+            compressed_size += len(data)
+
+            if start_message is not None:
+                if not more_body:
+                    headers["content-length"] = str(len(data))
+                await send(start_message)
+                start_message = None
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+            if not more_body:
+                scope[RAW_RESPONSE_SIZE] = raw_size
+                COMPRESSION_DURATION.labels(encoding=coding).observe(elapsed)
+                if compressed_size:
+                    COMPRESSION_RATIO.labels(encoding=coding).observe(raw_size / compressed_size)
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None:
+            # Resposta sem corpo (o app encerrou após o start)
+            await send(start_message)
@@ -1,15 +1,36 @@
 import secrets
+import time
 from typing import Any, Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, PostgresDsn, validator
 
 
+def async_database_uri(uri: str) -> str:
+    """DSN of the async driver for a sync DSN (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+    for scheme, async_scheme in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if uri.startswith(scheme):
+            return async_scheme + uri[len(scheme):]
+    return uri
+
+
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     PROJECT_NAME: str = "Inventory Management API"
+
+    # Hash de senhas (bcrypt) em um executor dedicado, fora do threadpool do Starlette
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    # Processos em vez de threads: evita disputa pelo GIL com os handlers
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+    # Máximo de hashes em execução + na fila; acima disso a requisição recebe 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
     
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -22,11 +43,67 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Cache do usuário autenticado (get_current_user)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+
+    # Cache de tokens JWT já verificados (chave: SHA-256 do token)
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0
+
+    # Cache read-through de GET /products/{id}; desligue para comparar com o backend Node
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_MAX_SIZE: int = 10000
+    PRODUCT_CACHE_TTL_SECONDS: float = 60.0
+
+    # Intervalo da amostragem de métricas de sistema em background
+    SYSTEM_METRICS_INTERVAL_SECONDS: float = 10.0
+    # Intervalo das sondas de lag do event loop e de espera por thread do threadpool
+    RUNTIME_PROBE_INTERVAL_SECONDS: float = 0.5
+
+    # Threads do anyio para handlers, dependências e corpos streaming sync (padrão do anyio: 40)
+    THREADPOOL_SIZE: int = 40
+
+    # Limite de valores distintos do rótulo "endpoint" nas métricas HTTP
+    METRICS_MAX_ENDPOINT_LABELS: int = 100
+
+    # Listagens serializadas com encoders pré-compilados + orjson, sem validar cada linha
+    FAST_JSON_RESPONSES: bool = False
+
+    # Profiler por amostragem (opt-in): pilhas das requisições lentas em GET /debug/profile
+    PROFILER_ENABLED: bool = False
+    PROFILER_INTERVAL_SECONDS: float = 0.01
+    PROFILER_SLOW_REQUEST_SECONDS: float = 0.5
+    # Fração máxima de uma CPU gasta amostrando; acima disso o intervalo aumenta
+    PROFILER_MAX_OVERHEAD: float = 0.02
+    PROFILER_MAX_PROFILES: int = 100
+    PROFILER_MAX_DEPTH: int = 128
+    # Exigido no cabeçalho X-Profiler-Token; vazio = /debug/profile responde 404
+    PROFILER_TOKEN: str = ""
+
+    # Linhas por lote lidas do cursor no servidor (e por chunk enviado) nos endpoints /export
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Compressão das respostas (br e zstd só se os pacotes brotli/zstandard estiverem instalados)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: str = "br,zstd,gzip"
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Endpoints /bulk: linhas por instrução multi-row e máximo de linhas por requisição
+    BULK_BATCH_SIZE: int = 500
+    BULK_MAX_ROWS: int = 10000
+
     POSTGRES_SERVER: str = "db"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "inventory"
-    DATABASE_URI: Optional[PostgresDsn] = None
+    # Qualquer DSN do SQLAlchemy (PostgreSQL em produção; SQLite para testes locais)
+    DATABASE_URI: Optional[str] = None
 
     @validator("DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
@@ -44,9 +121,58 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    # Pool de conexões (QueuePool). Os padrões são os do SQLAlchemy
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Segundos até reciclar uma conexão (-1 desativa)
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Conexões abertas no startup, antes da primeira requisição (None = DB_POOL_SIZE; 0 desativa)
+    DB_POOL_WARMUP: Optional[int] = None
+
+    # Réplicas de leitura (DSNs separados por vírgula): os GETs de leitura vão para elas,
+    # em rodízio; vazio = tudo no primário
+    DATABASE_REPLICA_URIS: str = ""
+    # Read-your-writes: depois de uma escrita, as leituras do mesmo usuário vão ao primário
+    # por este tempo (deve cobrir o atraso de replicação)
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    READ_YOUR_WRITES_MAX_SIZE: int = 100000
+
+    # Instruções SQL mais lentas que isso são logadas (logger app.db.slow_queries); 0 desativa
+    DB_SLOW_QUERY_SECONDS: float = 0.5
+
+    # Async database mode: handlers use AsyncSession over asyncpg instead of
+    # the sync SessionLocal running in Starlette's threadpool
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str):
+            return v
+        return async_database_uri(str(values.get("DATABASE_URI") or ""))
+
+    # Servidor (gunicorn.conf.py): workers uvicorn; 0 = um por CPU disponível ao container
+    SERVER_BIND: str = "0.0.0.0:8000"
+    SERVER_WORKERS: int = 0
+    # Implementações do loop e do parser HTTP do uvicorn ("auto" usa uvloop/httptools se instalados)
+    SERVER_LOOP: str = "auto"
+    SERVER_HTTP: str = "auto"
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    # Worker sem heartbeat por mais que isso é reiniciado; graceful: prazo para terminar no shutdown
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    # Diretório das amostras do prometheus_client em modo multiprocesso (limpo ao iniciar o master)
+    METRICS_MULTIPROC_DIR: str = "/tmp/prometheus-multiproc"
+
     class Config:
         case_sensitive = True
         env_file = ".env"
 
 
+# Medido para a fase "settings" do cold start (app/main.py)
+SETTINGS_LOAD_STARTED = time.perf_counter()
 settings = Settings()
+SETTINGS_LOAD_SECONDS = time.perf_counter() - SETTINGS_LOAD_STARTED
@@ -1,8 +1,15 @@
+import asyncio
 import time
 import psutil
 import os
 import gc
-from prometheus_client import Counter, Histogram, Gauge
+from anyio import to_thread
+from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge, generate_latest, multiprocess
+
+# Com vários workers (gunicorn.conf.py), PROMETHEUS_MULTIPROC_DIR ativa o modo
+# multiprocesso do prometheus_client: cada worker grava suas amostras em arquivos
+# e o multiprocess_mode de cada Gauge define a agregação no /metrics
+# ('liveall': uma série por worker, rótulo pid; 'livesum'/'max': um valor só)
 
 # Métricas de requisições HTTP
 REQUEST_COUNT = Counter(
@@ -20,50 +27,180 @@ REQUEST_LATENCY = Histogram(
 # Métricas de sistema
 CPU_USAGE = Gauge(
     'app_cpu_usage_percent',
-    'Current CPU usage percentage of the application process'
+    'Current CPU usage percentage of the application process',
+    multiprocess_mode='liveall'
 )
 
 MEMORY_USAGE = Gauge(
     'app_memory_usage_bytes',
-    'Current memory usage in bytes of the application process'
+    'Current memory usage in bytes of the application process',
+    multiprocess_mode='liveall'
 )
 
 MEMORY_USAGE_PERCENT = Gauge(
     'app_memory_usage_percent', 
-    'Current memory usage percentage of the application process'
+    'Current memory usage percentage of the application process',
+    multiprocess_mode='liveall'
 )
 
 CPU_COUNT = Gauge(
     'app_cpu_count',
-    'Number of CPU cores available to the application'
+    'Number of CPU cores available to the application',
+    multiprocess_mode='max'
 )
 
 MEMORY_TOTAL = Gauge(
     'app_memory_total_bytes',
-    'Total system memory in bytes'
+    'Total system memory in bytes',
+    multiprocess_mode='max'
 )
 
 DISK_USAGE = Gauge(
     'app_disk_usage_bytes',
     'Current disk usage in bytes',
-    ['path']
+    ['path'],
+    multiprocess_mode='max'
 )
 
 DISK_USAGE_PERCENT = Gauge(
     'app_disk_usage_percent',
     'Current disk usage percentage',
-    ['path']
+    ['path'],
+    multiprocess_mode='max'
 )
 
 ACTIVE_CONNECTIONS = Gauge(
     'app_active_connections',
-    'Number of active database connections'
+    'Number of active database connections',
+    multiprocess_mode='livesum'
+)
+
+# Métricas do pool de conexões (SQLAlchemy pool events)
+DB_POOL_SIZE = Gauge(
+    'app_db_pool_size',
+    'Configured size of the database connection pool',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'app_db_pool_checked_out',
+    'Database connections currently checked out from the pool',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_IDLE = Gauge(
+    'app_db_pool_idle',
+    'Idle database connections held by the pool',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'app_db_pool_overflow',
+    'Database connections opened beyond pool_size',
+    ['engine'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'app_db_pool_checkout_wait_seconds',
+    'Time spent waiting to check out a connection from the pool',
+    ['engine'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    'app_db_pool_checkout_timeouts_total',
+    'Checkouts that failed because the pool was exhausted for pool_timeout',
+    ['engine']
+)
+
+DB_STATEMENT_DURATION = Histogram(
+    'app_db_statement_duration_seconds',
+    'Execution time of SQL statements, by engine (primary, replicas)',
+    ['engine'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+)
+
+DB_READ_ROUTING = Counter(
+    'app_db_read_routing_total',
+    'Read-only requests by where they were routed: replica, or primary after a recent write',
+    ['target']
+)
+
+DB_POOL_CONNECT_LATENCY = Histogram(
+    'app_db_pool_connect_seconds',
+    'Time to open a new DBAPI connection',
+    ['engine']
+)
+
+# Métricas de hash de senha (bcrypt)
+PASSWORD_HASH_DURATION = Histogram(
+    'app_password_hash_duration_seconds',
+    'Time spent computing a bcrypt hash or verification',
+    ['operation'],
+    buckets=(.005, .01, .025, .05, .1, .2, .3, .5, .75, 1.0, 2.0, 5.0)
+)
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    'app_password_hash_queue_wait_seconds',
+    'Time a password hash waited for a free worker in the hash executor',
+    ['operation'],
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+)
+
+# Métricas dos caches em memória (app/core/cache.py)
+CACHE_HITS = Counter(
+    'app_cache_hits_total',
+    'Lookups answered by an in-process cache',
+    ['cache']
+)
+
+CACHE_MISSES = Counter(
+    'app_cache_misses_total',
+    'Lookups not found (or expired) in an in-process cache',
+    ['cache']
+)
+
+CACHE_EVICTIONS = Counter(
+    'app_cache_evictions_total',
+    'Entries dropped from an in-process cache',
+    ['cache', 'reason']
+)
+
+CACHE_ENTRIES = Gauge(
+    'app_cache_entries',
+    'Entries currently held by an in-process cache',
+    ['cache'],
+    multiprocess_mode='livesum'
 )
 
 # Métricas adicionais para comparação com Node.js
 RESPONSE_SIZE = Histogram(
     'app_response_size_bytes',
-    'Size of HTTP responses in bytes',
+    'Size of HTTP responses in bytes: body as produced (kind="raw") and as sent (kind="wire")',
+    ['method', 'endpoint', 'kind']
+)
+
+COMPRESSION_DURATION = Histogram(
+    'app_response_compression_seconds',
+    'Time spent compressing a response body',
+    ['encoding'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+COMPRESSION_RATIO = Histogram(
+    'app_response_compression_ratio',
+    'Uncompressed size divided by compressed size of a response body',
+    ['encoding'],
+    buckets=(1, 1.5, 2, 3, 4, 5, 7.5, 10, 15, 20, 50)
+)
+
+RESPONSE_TTFB = Histogram(
+    'app_response_ttfb_seconds',
+    'Time from request arrival until the response status and headers are sent',
     ['method', 'endpoint']
 )
 
@@ -75,7 +212,8 @@ REQUEST_SIZE = Histogram(
 
 CONCURRENT_REQUESTS = Gauge(
     'app_concurrent_requests',
-    'Number of concurrent requests being processed'
+    'Number of concurrent requests being processed',
+    multiprocess_mode='livesum'
 )
 
 DB_QUERY_DURATION = Histogram(
@@ -84,6 +222,88 @@ DB_QUERY_DURATION = Histogram(
     ['operation']
 )
 
+# Por requisição HTTP, a partir dos eventos de cursor dos engines (app/db/instrumentation.py)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'app_db_queries_per_request',
+    'SQL statements executed while handling one request',
+    ['method', 'endpoint'],
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100, 250)
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    'app_db_time_per_request_seconds',
+    'Time spent executing SQL statements while handling one request',
+    ['method', 'endpoint'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+)
+
+DB_REQUEST_STATEMENTS = Counter(
+    'app_db_request_statements_total',
+    'SQL statements executed by requests, by route and statement type',
+    ['method', 'endpoint', 'statement']
+)
+
+DB_REQUEST_STATEMENT_TIME = Counter(
+    'app_db_request_statement_seconds_total',
+    'Time spent executing SQL statements by requests, by route and statement type',
+    ['method', 'endpoint', 'statement']
+)
+
+DB_SLOW_QUERIES = Counter(
+    'app_db_slow_queries_total',
+    'SQL statements slower than DB_SLOW_QUERY_SECONDS',
+    ['engine', 'statement']
+)
+
+# Profiler por amostragem (app/core/profiling.py), só com PROFILER_ENABLED
+PROFILER_SAMPLE_DURATION = Histogram(
+    'app_profiler_sample_duration_seconds',
+    'CPU time the sampling profiler spends on one pass over the requests in flight',
+    buckets=(.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025)
+)
+
+PROFILER_INTERVAL = Gauge(
+    'app_profiler_interval_seconds',
+    'Current sampling interval of the profiler (grows when sampling gets expensive)',
+    multiprocess_mode='liveall'
+)
+
+PROFILER_PROFILES = Counter(
+    'app_profiler_profiles_total',
+    'Slow requests whose sampled stacks were kept by the profiler'
+)
+
+# Threadpool do anyio (handlers, dependências e corpos streaming sync) e event loop
+THREADPOOL_SIZE = Gauge(
+    'app_threadpool_size',
+    'Tokens of the anyio thread limiter that runs sync handlers',
+    multiprocess_mode='livesum'
+)
+
+THREADPOOL_BUSY = Gauge(
+    'app_threadpool_busy_threads',
+    'Threadpool tokens in use (sync handlers, dependencies and streamed bodies running)',
+    multiprocess_mode='livesum'
+)
+
+THREADPOOL_WAITING = Gauge(
+    'app_threadpool_waiting_tasks',
+    'Tasks waiting for a threadpool token',
+    multiprocess_mode='livesum'
+)
+
+THREADPOOL_ACQUIRE_WAIT = Histogram(
+    'app_threadpool_acquire_wait_seconds',
+    'Time from submitting a probe call to the threadpool until it starts running in a thread',
+    buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0)
+)
+
+EVENT_LOOP_LAG = Histogram(
+    'app_event_loop_lag_seconds',
+    'How late the event loop wakes up a probe timer',
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0)
+)
+
 GC_COLLECTIONS = Counter(
     'app_gc_collections_total',
     'Total number of garbage collections',
@@ -97,12 +317,14 @@ GC_TIME = Counter(
 
 THREAD_COUNT = Gauge(
     'app_thread_count',
-    'Number of threads in the process'
+    'Number of threads in the process',
+    multiprocess_mode='liveall'
 )
 
 FILE_DESCRIPTORS = Gauge(
     'app_file_descriptors',
-    'Number of open file descriptors'
+    'Number of open file descriptors',
+    multiprocess_mode='liveall'
 )
 
 NETWORK_IO = Counter(
@@ -113,12 +335,21 @@ NETWORK_IO = Counter(
 
 STARTUP_TIME = Gauge(
     'app_startup_time_seconds',
-    'Application startup time in seconds'
+    'Application startup time in seconds (sum of the startup phases)',
+    multiprocess_mode='liveall'
+)
+
+STARTUP_PHASE_DURATION = Gauge(
+    'app_startup_phase_seconds',
+    'Duration of each cold-start phase: imports, settings, engine_connect, schema_check, pool_warmup',
+    ['phase'],
+    multiprocess_mode='liveall'
 )
 
 HEAP_SIZE = Gauge(
     'app_heap_size_bytes',
-    'Current heap size in bytes'
+    'Current heap size in bytes',
+    multiprocess_mode='liveall'
 )
 
 ERROR_RATE = Counter(
@@ -127,14 +358,38 @@ ERROR_RATE = Counter(
     ['error_type']
 )
 
+SYSTEM_METRICS_SAMPLE_DURATION = Gauge(
+    'app_system_metrics_sample_duration_seconds',
+    'Duration of the last background system metrics sampling pass',
+    multiprocess_mode='liveall'
+)
+
 UPTIME = Gauge(
     'app_uptime_seconds',
-    'Application uptime in seconds'
+    'Application uptime in seconds',
+    multiprocess_mode='liveall'
 )
 
-# Variáveis globais para rastreamento
+# Variáveis globais para rastreamento (por processo; com vários workers o
+# gauge CONCURRENT_REQUESTS soma os valores de todos)
 _concurrent_requests = 0
 _startup_time = time.time()
+# Reutilizado entre amostras: cpu_percent() mede desde a chamada anterior
+_process = None
+
+def render_latest() -> bytes:
+    """
+    Exposition text for ``/metrics``.
+
+    In multiprocess mode the samples of every live worker are aggregated
+    from PROMETHEUS_MULTIPROC_DIR, so a scrape gives the same answer
+    whichever worker serves it.
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
 
 def get_concurrent_requests():
     return _concurrent_requests
@@ -156,9 +411,13 @@ def get_startup_time():
 
 def update_system_metrics():
     """Atualiza as métricas de sistema"""
+    global _process
+    sample_start = time.perf_counter()
     try:
-        # Obter processo atual
-        process = psutil.Process(os.getpid())
+        # Obter processo atual (recriado se o processo mudou, p.ex. após fork)
+        if _process is None or _process.pid != os.getpid():
+            _process = psutil.Process(os.getpid())
+        process = _process
         
         # CPU metrics
         cpu_percent = process.cpu_percent()
@@ -200,10 +459,6 @@ def update_system_metrics():
         except:
             pass
         
-        # Database connections (approximation)
-        connections = len(process.connections())
-        ACTIVE_CONNECTIONS.set(connections)
-        
         # Uptime
         UPTIME.set(time.time() - _startup_time)
         
@@ -215,3 +470,48 @@ def update_system_metrics():
         # Log do erro sem quebrar a aplicação
         print(f"Error updating system metrics: {e}")
         ERROR_RATE.labels(error_type='metrics_update').inc()
+    finally:
+        SYSTEM_METRICS_SAMPLE_DURATION.set(time.perf_counter() - sample_start)
+
+
+async def run_system_metrics_sampler(interval: float) -> None:
+    """
+    Samples system metrics every ``interval`` seconds until cancelled.
+
+    Each pass runs in the loop's default executor, so the psutil syscalls
+    never block request handling; scrapes just read the last values set.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, update_system_metrics)
+        await asyncio.sleep(interval)
+
+
+async def run_event_loop_lag_probe(interval: float) -> None:
+    """
+    Sleeps ``interval`` seconds in a loop and records how much longer each
+    sleep took: lag means the loop was busy (CPU work or blocking calls in
+    async code) when the timer was due.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_threadpool_probe(interval: float) -> None:
+    """
+    Every ``interval`` seconds, records the threadpool limiter usage and runs
+    a no-op in the threadpool, timing how long it waits for a thread: the
+    same queue the sync handlers go through.
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    while True:
+        statistics = limiter.statistics()
+        THREADPOOL_SIZE.set(limiter.total_tokens)
+        THREADPOOL_BUSY.set(statistics.borrowed_tokens)
+        THREADPOOL_WAITING.set(statistics.tasks_waiting)
+        submitted = time.perf_counter()
+        started = await to_thread.run_sync(time.perf_counter)
+        THREADPOOL_ACQUIRE_WAIT.observe(started - submitted)
+        await asyncio.sleep(interval)
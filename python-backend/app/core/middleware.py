@@ -0,0 +1,121 @@
+import time
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import RAW_RESPONSE_SIZE
+from app.core.config import settings
+from app.core.metrics import (
+    REQUEST_COUNT, REQUEST_LATENCY, RESPONSE_SIZE, RESPONSE_TTFB, REQUEST_SIZE,
+    ERROR_RATE, DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, DB_REQUEST_STATEMENTS,
+    DB_REQUEST_STATEMENT_TIME, increment_concurrent_requests, decrement_concurrent_requests
+)
+from app.db.instrumentation import RequestQueries, track_request_queries
+
+
+# Rótulos usados quando a requisição não casa com nenhuma rota, ou quando o
+# limite de rótulos distintos já foi atingido
+UNMATCHED_ENDPOINT = "<unmatched>"
+OVERFLOW_ENDPOINT = "<other>"
+
+
+class EndpointLabels:
+    """
+    Resolves the ``endpoint`` metric label from the matched route template.
+
+    Labels are cached per route object and capped at ``max_labels`` distinct
+    values, so paths coming from scanners cannot grow metric cardinality.
+    """
+
+    def __init__(self, max_labels: int) -> None:
+        self.max_labels = max_labels
+        # Chave: id() da rota (rotas definem __eq__ e não são hasheáveis)
+        self._labels: Dict[int, str] = {}
+
+    def resolve(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ENDPOINT
+        label = self._labels.get(id(route))
+        if label is None:
+            if len(self._labels) >= self.max_labels:
+                return OVERFLOW_ENDPOINT
+            label = getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ENDPOINT)
+            self._labels[id(route)] = label
+        return label
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware that records request metrics.
+
+    It wraps ``send`` instead of buffering the response, so streamed bodies
+    are counted byte by byte and time-to-first-byte (response start) is
+    recorded separately from the total latency (last body chunk). The SQL
+    statements run for the request (streamed bodies included) are counted
+    and timed per route and statement type.
+    """
+
+    def __init__(self, app: ASGIApp, max_endpoint_labels: Optional[int] = None) -> None:
+        self.app = app
+        self.endpoint_labels = EndpointLabels(
+            max_endpoint_labels or settings.METRICS_MAX_ENDPOINT_LABELS
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        increment_concurrent_requests()
+        start_time = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # O roteamento já ocorreu: scope["route"] está preenchido
+                RESPONSE_TTFB.labels(method=method, endpoint=self.endpoint_labels.resolve(scope)).observe(
+                    time.perf_counter() - start_time
+                )
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        with track_request_queries(scope) as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception:
+                ERROR_RATE.labels(error_type='request_processing').inc()
+                raise
+            finally:
+                duration = time.perf_counter() - start_time
+                endpoint = self.endpoint_labels.resolve(scope)
+                self.record_queries(queries, method, endpoint)
+                REQUEST_COUNT.labels(method=method, endpoint=endpoint, http_status=status_code).inc()
+                REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(duration)
+                RESPONSE_SIZE.labels(method=method, endpoint=endpoint, kind="wire").observe(response_size)
+                # Sem compressão os dois tamanhos coincidem
+                RESPONSE_SIZE.labels(method=method, endpoint=endpoint, kind="raw").observe(
+                    scope.get(RAW_RESPONSE_SIZE, response_size)
+                )
+                # Tamanho do request
+                for name, value in scope["headers"]:
+                    if name == b"content-length":
+                        try:
+                            REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(int(value))
+                        except ValueError:
+                            pass
+                        break
+                decrement_concurrent_requests()
+
+    @staticmethod
+    def record_queries(queries: RequestQueries, method: str, endpoint: str) -> None:
+        DB_QUERIES_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(queries.count)
+        DB_TIME_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(queries.seconds)
+        for kind, (count, seconds) in queries.by_type.items():
+            DB_REQUEST_STATEMENTS.labels(method=method, endpoint=endpoint, statement=kind).inc(count)
+            DB_REQUEST_STATEMENT_TIME.labels(method=method, endpoint=endpoint, statement=kind).inc(seconds)
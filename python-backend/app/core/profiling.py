@@ -0,0 +1,320 @@
+"""
+Opt-in sampling profiler for slow requests (``PROFILER_ENABLED``).
+
+``ProfilerMiddleware`` registers every request in flight. A daemon thread
+wakes up every ``PROFILER_INTERVAL_SECONDS`` while there are requests in
+flight, takes ``sys._current_frames()`` and adds the stack of each thread
+working for a request to that request's samples:
+
+* the event loop thread, while the loop runs one of the request's tasks
+  (the task of the middleware and the tasks created under it, e.g. the
+  one that streams a response body);
+* a threadpool thread, while it runs a sync endpoint (routes declared on
+  routers with ``route_class=ProfiledRoute``) or produces a chunk of a
+  sync streamed body wrapped in ``sampled_iterator()``.
+
+Async requests are therefore sampled only while their code is on the CPU,
+sync endpoints for their whole run (DB waits included). The sampler needs
+the GIL to run, so long C calls that hold it are under-represented. When a request
+ends after ``PROFILER_SLOW_REQUEST_SECONDS`` or more, its stacks are kept
+(the last ``PROFILER_MAX_PROFILES`` requests) and served in folded format
+(one ``frame;frame;... count`` line per stack, the input of flamegraph.pl
+and speedscope) by ``GET /debug/profile``.
+
+The CPU time of each sampling pass is measured
+(``app_profiler_sample_duration_seconds``);
+when a pass costs more than ``PROFILER_MAX_OVERHEAD`` of the interval, the
+interval grows so the sampler never uses more than that fraction of a CPU.
+"""
+import asyncio
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, TypeVar
+)
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import PROFILER_INTERVAL, PROFILER_PROFILES, PROFILER_SAMPLE_DURATION
+
+T = TypeVar("T")
+
+# Prefixos removidos dos caminhos dos arquivos nos frames (site-packages, stdlib, projeto)
+_PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in sys.path if path and os.path.isdir(path)}, key=len, reverse=True
+)
+
+
+class _InFlight:
+    """A request being served, with the threads working for it and its samples."""
+
+    __slots__ = ("method", "scope", "started", "threads", "samples", "__weakref__")
+
+    def __init__(self, scope: Scope) -> None:
+        self.method = scope["method"]
+        self.scope = scope
+        self.started = time.perf_counter()
+        # Threads do pool executando um endpoint sync desta requisição
+        self.threads: set = set()
+        self.samples: Counter = Counter()
+
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return f"{self.method} {getattr(route, 'path_format', None) or self.scope['path']}"
+
+
+class Profile(NamedTuple):
+    route: str
+    path: str
+    duration: float
+    finished_at: float
+    samples: Counter
+
+
+_current_request: ContextVar[Optional[_InFlight]] = ContextVar("profiled_request", default=None)
+
+
+class SamplingProfiler:
+    def __init__(self) -> None:
+        self.profiles: Deque[Profile] = deque(maxlen=settings.PROFILER_MAX_PROFILES)
+        self._in_flight: Dict[int, _InFlight] = {}
+        # Tarefas asyncio -> requisição que as criou
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.Task, _InFlight]" = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._labels: Dict[Any, str] = {}
+        # Protege as amostras de uma requisição: depois do end() ninguém mais as altera
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- ciclo de vida -----------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Follow the tasks that requests create on ``loop``, from its thread."""
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        previous = loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            if previous is not None:
+                task = previous(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            # Chamado no contexto de quem cria a tarefa
+            request = _current_request.get()
+            if request is not None:
+                self._tasks[task] = request
+            return task
+
+        loop.set_task_factory(task_factory)
+
+    # -- requisições -------------------------------------------------------
+
+    def begin(self, scope: Scope) -> _InFlight:
+        request = _InFlight(scope)
+        self._in_flight[id(request)] = request
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks[task] = request
+        return request
+
+    def end(self, request: _InFlight) -> None:
+        with self._lock:
+            self._in_flight.pop(id(request), None)
+        duration = time.perf_counter() - request.started
+        if duration >= settings.PROFILER_SLOW_REQUEST_SECONDS and request.samples:
+            self.profiles.append(Profile(
+                request.route(), request.scope["path"], duration, time.time(), request.samples
+            ))
+            PROFILER_PROFILES.inc()
+
+    # -- amostragem --------------------------------------------------------
+
+    def _run(self) -> None:
+        interval = settings.PROFILER_INTERVAL_SECONDS
+        PROFILER_INTERVAL.set(interval)
+        # Intervalo com jitter: um período fixo entra em fase com trabalho periódico
+        # (ex.: chunks de um export) e amostraria sempre o mesmo ponto
+        while not self._stop.wait(interval * random.uniform(0.5, 1.5)):
+            if not self._in_flight:
+                continue
+            # CPU da thread do profiler: o tempo esperando pelo GIL não é custo da amostragem
+            started = time.thread_time()
+            self.sample()
+            elapsed = time.thread_time() - started
+            PROFILER_SAMPLE_DURATION.observe(elapsed)
+            # Limita o custo: no máximo PROFILER_MAX_OVERHEAD de uma CPU
+            next_interval = max(
+                settings.PROFILER_INTERVAL_SECONDS, elapsed / settings.PROFILER_MAX_OVERHEAD
+            )
+            if next_interval != interval:
+                interval = next_interval
+                PROFILER_INTERVAL.set(interval)
+
+    def sample(self) -> None:
+        """Add the current stack of every thread working for a request in flight."""
+        frames = sys._current_frames()
+        loop_request = None
+        if self._loop is not None:
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                loop_request = self._tasks.get(task)
+        for request in list(self._in_flight.values()):
+            threads = list(request.threads)
+            if request is loop_request:
+                threads.append(self._loop_thread)
+            stacks = [self._fold(frames[ident]) for ident in threads if ident in frames]
+            with self._lock:
+                # A requisição pode ter terminado desde a cópia de _in_flight
+                if id(request) not in self._in_flight:
+                    continue
+                for stack in stacks:
+                    request.samples[stack] += 1
+
+    def _fold(self, frame) -> str:
+        labels: List[str] = []
+        while frame is not None and len(labels) < settings.PROFILER_MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                if len(self._labels) >= 50000:
+                    self._labels.clear()
+                label = self._labels[code] = _label(code)
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+    # -- saída -------------------------------------------------------------
+
+    def folded(self, endpoint: Optional[str] = None) -> str:
+        """Kept stacks merged by route, in folded format (route template as the root frame)."""
+        merged: Counter = Counter()
+        for profile in list(self.profiles):
+            if endpoint is None or profile.route.split(" ", 1)[1] == endpoint:
+                for stack, count in profile.samples.items():
+                    merged[f"{profile.route};{stack}"] += count
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(merged.items()))
+
+    def clear(self) -> None:
+        self.profiles.clear()
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    # ";" separa frames e o último espaço separa a contagem no formato folded
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware that registers each HTTP request with the profiler."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profiler.attach(asyncio.get_running_loop())
+        request = profiler.begin(scope)
+        token = _current_request.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            profiler.end(request)
+
+
+@contextmanager
+def _sampled_thread() -> Iterator[None]:
+    """Sample the current (threadpool) thread for the request in this context."""
+    request = _current_request.get()
+    if request is None:
+        yield
+        return
+    ident = threading.get_ident()
+    request.threads.add(ident)
+    try:
+        yield
+    finally:
+        request.threads.discard(ident)
+
+
+def _sampled_in_thread(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        with _sampled_thread():
+            return endpoint(*args, **kwargs)
+
+    wrapper.__sampled_in_thread__ = True
+    return wrapper
+
+
+def sampled_iterator(iterator: Iterable[T]) -> Iterable[T]:
+    """
+    Sync response body whose chunks are produced with their threadpool
+    thread sampled (Starlette runs each ``next()`` in the threadpool).
+    """
+    if not settings.PROFILER_ENABLED:
+        return iterator
+    return _sampled_iteration(iter(iterator))
+
+
+def _sampled_iteration(iterator: Iterator[T]) -> Iterator[T]:
+    while True:
+        with _sampled_thread():
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route whose sync endpoint marks the threadpool thread running it, so the
+    profiler samples that thread for the request. A plain ``APIRoute`` when
+    the profiler is disabled.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # include_router recria as rotas com o endpoint já embrulhado
+        if (settings.PROFILER_ENABLED and not asyncio.iscoroutinefunction(endpoint)
+                and not getattr(endpoint, "__sampled_in_thread__", False)):
+            endpoint = _sampled_in_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
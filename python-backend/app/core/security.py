@@ -1,12 +1,20 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import ERROR_RATE, PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 ALGORITHM = "HS256"
 
@@ -31,3 +39,66 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class PasswordHashQueueFull(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hashes are already in flight."""
+
+
+_hash_executor: Optional[Executor] = None
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_USE_PROCESSES:
+            # spawn: não herda threads/conexões do processo do servidor
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+def _timed_call(func: Callable, *args: Any):
+    # Executa no worker; time.time() é comparável entre processos
+    started = time.time()
+    result = func(*args)
+    return result, started, time.time()
+
+
+async def _run_hash(operation: str, func: Callable, *args: Any) -> Any:
+    if not _hash_slots.acquire(blocking=False):
+        ERROR_RATE.labels(error_type='password_hash_queue_full').inc()
+        raise PasswordHashQueueFull()
+    try:
+        submitted = time.time()
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(
+            _get_hash_executor(), _timed_call, func, *args
+        )
+    finally:
+        _hash_slots.release()
+    PASSWORD_HASH_QUEUE_WAIT.labels(operation=operation).observe(max(started - submitted, 0.0))
+    PASSWORD_HASH_DURATION.labels(operation=operation).observe(finished - started)
+    return result
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash("hash", get_password_hash, password)
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False)
+        _hash_executor = None
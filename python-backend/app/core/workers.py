@@ -0,0 +1,14 @@
+"""
+Gunicorn worker class for the multi-worker mode (see ``gunicorn.conf.py``).
+
+Gunicorn's own settings (bind, backlog, keep-alive, timeouts) reach uvicorn
+through ``UvicornWorker``; the event loop and HTTP parser implementations
+come from ``SERVER_LOOP``/``SERVER_HTTP``.
+"""
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+from app.core.config import settings
+
+
+class UvicornWorker(_UvicornWorker):
+    CONFIG_KWARGS = {"loop": settings.SERVER_LOOP, "http": settings.SERVER_HTTP}
@@ -1,17 +1,104 @@
+import itertools
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import time
 from app.core.metrics import DB_QUERY_DURATION
 
-from app.core.config import settings
+from app.core.config import async_database_uri, settings
+from app.db.instrumentation import (
+    InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+)
+
+
+def _pool_options(url: str, poolclass) -> dict:
+    # SQLite usa o pool padrão do dialeto (sem pool_size/max_overflow)
+    if url.startswith("sqlite"):
+        return {}
+    return dict(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
 
-engine = create_engine(str(settings.DATABASE_URI))
+
+engine = create_engine(
+    str(settings.DATABASE_URI),
+    pool_logging_name="primary",
+    **_pool_options(str(settings.DATABASE_URI), InstrumentedQueuePool),
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine/sessão assíncronos (asyncpg), criados apenas quando DATABASE_ASYNC está ativo
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URI,
+        pool_logging_name="async",
+        **_pool_options(settings.ASYNC_DATABASE_URI, InstrumentedAsyncQueuePool),
+    )
+    instrument_engine(async_engine.sync_engine)
+    # expire_on_commit=False: atributos expirados exigiriam lazy load, que não
+    # é permitido fora de um contexto await
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+# Réplicas de leitura: um engine (e pool, rótulo engine="replicaN") por DSN, só no modo em uso
+replica_engines = []
+async_replica_engines = []
+for index, uri in enumerate(u.strip() for u in settings.DATABASE_REPLICA_URIS.split(",") if u.strip()):
+    if settings.DATABASE_ASYNC:
+        uri = async_database_uri(uri)
+        replica = create_async_engine(
+            uri,
+            pool_logging_name=f"async-replica{index}",
+            **_pool_options(uri, InstrumentedAsyncQueuePool),
+        )
+        instrument_engine(replica.sync_engine)
+        async_replica_engines.append(replica)
+    else:
+        replica = create_engine(
+            uri,
+            pool_logging_name=f"replica{index}",
+            **_pool_options(uri, InstrumentedQueuePool),
+        )
+        instrument_engine(replica)
+        replica_engines.append(replica)
+_replica_turn = itertools.count()
+
 Base = declarative_base()
 
 
+def warm_pool(engine, connections: int) -> None:
+    """Open ``connections`` pooled connections up front, so early requests skip the connect."""
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+async def warm_async_pool(engine, connections: int) -> None:
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(await engine.connect())
+    finally:
+        for connection in opened:
+            await connection.close()
+
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -23,3 +110,49 @@ def get_db():
         db.close()
         duration = time.time() - start_time
         DB_QUERY_DURATION.labels(operation='close').observe(duration)
+
+
+async def get_async_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        start_time = time.time()
+        await db.close()
+        duration = time.time() - start_time
+        DB_QUERY_DURATION.labels(operation='close').observe(duration)
+
+
+def replica_session():
+    """Session bound to the next read replica, in round robin (the primary without replicas)."""
+    if not replica_engines:
+        return SessionLocal()
+    return SessionLocal(bind=replica_engines[next(_replica_turn) % len(replica_engines)])
+
+
+def async_replica_session():
+    if not async_replica_engines:
+        return AsyncSessionLocal()
+    return AsyncSessionLocal(bind=async_replica_engines[next(_replica_turn) % len(async_replica_engines)])
+
+
+def get_replica_db():
+    db = replica_session()
+    try:
+        yield db
+    finally:
+        start_time = time.time()
+        db.close()
+        duration = time.time() - start_time
+        DB_QUERY_DURATION.labels(operation='close').observe(duration)
+
+
+async def get_async_replica_db():
+    db = async_replica_session()
+    try:
+        yield db
+    finally:
+        start_time = time.time()
+        await db.close()
+        duration = time.time() - start_time
+        DB_QUERY_DURATION.labels(operation='close').observe(duration)
@@ -0,0 +1,189 @@
+"""
+Connection pool and statement instrumentation based on SQLAlchemy events.
+
+Every engine is registered under a name (the ``engine`` label of the pool
+metrics). The name travels as the pool's ``logging_name`` so it survives
+``engine.dispose()``, which recreates the pool.
+
+Each statement a cursor executes is timed and classified by its first
+keyword (``select``, ``insert``, ``update``, ``delete`` or ``other``).
+Inside ``track_request_queries()`` (opened by ``PrometheusMiddleware`` for
+every HTTP request) the statements are also added up for the request, so
+the middleware can record queries and DB time per route. The tracker lives
+in a context variable, which Starlette copies into the threadpool and the
+streaming tasks; sync and async sessions both report to it. Statements
+slower than ``DB_SLOW_QUERY_SECONDS`` are logged with their route.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import (
+    ACTIVE_CONNECTIONS, DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECT_LATENCY, DB_POOL_IDLE,
+    DB_POOL_OVERFLOW, DB_POOL_SIZE, DB_QUERY_DURATION, DB_SLOW_QUERIES,
+    DB_STATEMENT_DURATION
+)
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+# Pool atual de cada engine instrumentado, por nome
+_pools: Dict[str, Pool] = {}
+
+# Primeira palavra da instrução -> rótulo "statement"/"operation"
+_FIRST_KEYWORD = re.compile(r"\s*(\w+)")
+STATEMENT_TYPES = {
+    "select": "select", "with": "select",
+    "insert": "insert", "update": "update", "delete": "delete",
+}
+# Tamanho máximo do SQL no log de instruções lentas (INSERTs multi-row podem ser enormes)
+SLOW_QUERY_LOG_MAX_LENGTH = 2000
+
+
+def statement_type(statement: str) -> str:
+    match = _FIRST_KEYWORD.match(statement)
+    return STATEMENT_TYPES.get(match.group(1).lower(), "other") if match else "other"
+
+
+class RequestQueries:
+    """SQL statements run on behalf of one HTTP request."""
+
+    __slots__ = ("scope", "count", "seconds", "by_type")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        # statement -> [quantidade, segundos]
+        self.by_type: Dict[str, List] = {}
+
+    def record(self, kind: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        totals = self.by_type.get(kind)
+        if totals is None:
+            self.by_type[kind] = [1, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+
+    def route(self) -> str:
+        """``METHOD /route/template`` of the request, for the slow-query log."""
+        if self.scope is None:
+            return "-"
+        route = self.scope.get("route")
+        path = getattr(route, "path_format", None) or self.scope.get("path", "-")
+        return f"{self.scope.get('method', '-')} {path}"
+
+
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+@contextmanager
+def track_request_queries(scope: Optional[dict] = None) -> Iterator[RequestQueries]:
+    """Add up the statements executed in this context (and its threads/tasks)."""
+    queries = RequestQueries(scope)
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+
+class _InstrumentedPoolMixin:
+    """
+    Observa a espera de cada checkout e atualiza os gauges do pool.
+
+    Os gauges são atualizados aqui e não no evento "checkin", que dispara
+    antes da conexão voltar para a fila.
+    """
+
+    def connect(self):
+        name = self.logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(engine=name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(engine=name).observe(time.perf_counter() - start)
+            _refresh_pool_gauges(self)
+
+    def _return_conn(self, record):
+        super()._return_conn(record)
+        _refresh_pool_gauges(self)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _refresh_pool_gauges(pool: Pool) -> None:
+    name = pool.logging_name or "default"
+    _pools[name] = pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_SIZE.labels(engine=name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(engine=name).set(pool.checkedout())
+        DB_POOL_IDLE.labels(engine=name).set(pool.checkedin())
+        DB_POOL_OVERFLOW.labels(engine=name).set(max(pool.overflow(), 0))
+    ACTIVE_CONNECTIONS.set(sum(
+        p.checkedout() for p in _pools.values() if isinstance(p, QueuePool)
+    ))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Register a (sync) engine and time the DBAPI connects and statements it runs."""
+
+    @event.listens_for(engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        connection = dialect.connect(*cargs, **cparams)
+        DB_POOL_CONNECT_LATENCY.labels(
+            engine=engine.pool.logging_name or "default"
+        ).observe(time.perf_counter() - start)
+        return connection
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _statement_started(conn, cursor, statement, parameters, context, executemany):
+        # No contexto de execução (e não em conn.info): nada fica para trás se a instrução falhar
+        context._statement_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._statement_started
+        name = engine.pool.logging_name or "default"
+        kind = statement_type(statement)
+        DB_STATEMENT_DURATION.labels(engine=name).observe(elapsed)
+        DB_QUERY_DURATION.labels(operation=kind).observe(elapsed)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.record(kind, elapsed)
+        threshold = settings.DB_SLOW_QUERY_SECONDS
+        if threshold > 0 and elapsed >= threshold:
+            DB_SLOW_QUERIES.labels(engine=name, statement=kind).inc()
+            slow_query_logger.warning(
+                "slow query: %.1f ms on %s (%s%s): %s",
+                elapsed * 1000, name,
+                queries.route() if queries is not None else "outside a request",
+                ", executemany" if executemany else "",
+                " ".join(statement[:SLOW_QUERY_LOG_MAX_LENGTH].split()),
+            )
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _refresh_pool_gauges(engine.pool)
+
+    _refresh_pool_gauges(engine.pool)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Table
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -36,7 +36,8 @@ class InventoryItem(Base):
     __tablename__ = "inventory_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"))
+    # Único: uma linha de estoque por produto (alvo do ON CONFLICT em /inventory/add)
+    product_id = Column(Integer, ForeignKey("products.id"), unique=True, index=True)
     quantity = Column(Integer, default=0)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -45,6 +46,8 @@ class InventoryItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    # Pedidos de um cliente em ordem de id: filtro + ordenação das listagens e do export
+    __table_args__ = (Index("ix_orders_customer_id_id", "customer_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"))
@@ -61,8 +64,8 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer)
     unit_price = Column(Float)
 
@@ -0,0 +1,64 @@
+"""
+Read-your-writes guard for the read-replica routing.
+
+Sessions record whether they wrote (ORM flushes and INSERT/UPDATE/DELETE
+statements); when one commits, the user it authenticated is kept in
+``recent_writers`` for ``READ_YOUR_WRITES_SECONDS``, and that user's
+read-only requests go to the primary until then instead of to a replica
+that may not have replayed the write yet.
+
+The guard is per process: with several workers it holds for requests that
+land on the worker that served the write. The window should cover the
+replication lag, which is usually far shorter.
+
+Shared read-through caches (``product_cache``) follow the same rule: only
+primary reads fill them, since a lagging replica's copy would be served to
+everyone, and requests kept on the primary skip them, since an entry filled
+before the user's write may still be there.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.cache import recent_writers
+
+# Chaves em Session.info
+USER_ID = "user_id"
+WROTE = "wrote"
+# Sessão de réplica, ou sessão do primário mantida por escrita recente do usuário
+REPLICA = "replica"
+OWN_WRITES = "own_writes"
+
+
+def reads_from_primary(user_id: int) -> bool:
+    return recent_writers.get(user_id) is not None
+
+
+def reads_shared_cache(session) -> bool:
+    return not session.info.get(OWN_WRITES, False)
+
+
+def fills_shared_cache(session) -> bool:
+    return not session.info.get(REPLICA, False)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_write_statement(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[WROTE] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    user_id = session.info.get(USER_ID)
+    if session.info.pop(WROTE, False) and user_id is not None:
+        recent_writers.set(user_id, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop(WROTE, None)
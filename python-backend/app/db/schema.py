@@ -0,0 +1,56 @@
+"""
+Schema version check against the Alembic migrations in ``migrations/``.
+
+Migrations are applied as a separate step (``alembic upgrade head``: the
+``python-migrate`` compose service, the ``python-backend-migrate`` Job in
+k8s). Workers never change the schema at startup; they only compare the
+database's revision with the head of the migration scripts and refuse to
+start on a mismatch.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Connection
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class SchemaVersionError(RuntimeError):
+    """The database is not at the migration revision this code expects."""
+
+
+def alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+
+@lru_cache(maxsize=None)
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def check_schema_version(connection: Connection) -> str:
+    current = MigrationContext.configure(connection).get_current_revision()
+    head = head_revision()
+    if current != head:
+        raise SchemaVersionError(
+            f"database schema is at revision {current or '<none>'}, expected {head}: "
+            "run `alembic upgrade head`"
+        )
+    return current
+
+
+def upgrade(revision: str = "head", connection: Optional[Connection] = None) -> None:
+    """
+    Apply the migrations in-process (benchmarks and local runs), to
+    DATABASE_URI or to the database of ``connection`` (committed by the caller).
+    """
+    config = alembic_config()
+    # Não reconfigurar o logging do processo que chamou
+    config.attributes["configure_logger"] = False
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
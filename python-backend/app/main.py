@@ -1,85 +1,39 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 import time
-import re
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from starlette.responses import Response
+
+# Início da fase "imports" do cold start (app_startup_phase_seconds)
+IMPORTS_STARTED = time.perf_counter()
+
+from typing import Optional
+
+from anyio import to_thread
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import hmac
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.router import api_router
-from app.core.config import settings
+from app.core.config import SETTINGS_LOAD_SECONDS, SETTINGS_LOAD_STARTED, settings
+from app.core.security import PasswordHashQueueFull, shutdown_hash_executor
 from app.core.metrics import (
-    REQUEST_COUNT, REQUEST_LATENCY, RESPONSE_SIZE, REQUEST_SIZE,
-    ERROR_RATE, increment_concurrent_requests, decrement_concurrent_requests,
-    get_startup_time, update_system_metrics, STARTUP_TIME
+    render_latest, run_event_loop_lag_probe, run_system_metrics_sampler, run_threadpool_probe,
+    STARTUP_PHASE_DURATION, STARTUP_TIME
 )
-from app.db.database import engine, Base
-
-# Função para normalizar endpoints com IDs
-def normalize_endpoint(path: str) -> str:
-    # Padrão para endpoints com IDs numéricos
-    patterns = [
-        r'/api/v1/products/\d+',
-        r'/api/v1/orders/\d+',
-        r'/api/v1/inventory/\d+'
-    ]
-    
-    # Substituir o padrão específico por uma versão normalizada
-    for pattern in patterns:
-        if re.match(pattern, path):
-            # Extrair a parte base do endpoint e adicionar /{id}
-            base_path = path.rsplit('/', 1)[0]
-            return f"{base_path}/{{id}}"
-    
-    return path
+from app.core.compression import CompressionMiddleware, skip_compression
+from app.core.middleware import PrometheusMiddleware
+from app.core.profiling import ProfilerMiddleware, profiler
+from app.db.database import (
+    async_engine, async_replica_engines, engine, replica_engines, warm_async_pool, warm_pool
+)
+from app.db.schema import check_schema_version
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        method = request.method
-        path = request.url.path
-        
-        # Normalizar o caminho para métricas
-        normalized_path = normalize_endpoint(path)
-        
-        # Métricas de request
-        increment_concurrent_requests()
-        
-        # Tamanho do request
-        try:
-            content_length = int(request.headers.get('content-length', 0))
-            REQUEST_SIZE.labels(method=method, endpoint=normalized_path).observe(content_length)
-        except:
-            pass
-        
-        start_time = time.time()
-        
-        try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-            
-            status_code = response.status_code
-            REQUEST_COUNT.labels(method=method, endpoint=normalized_path, http_status=status_code).inc()
-            REQUEST_LATENCY.labels(method=method, endpoint=normalized_path).observe(duration)
-            
-            # Tamanho da response
-            try:
-                response_size = len(response.body) if hasattr(response, 'body') else 0
-                RESPONSE_SIZE.labels(method=method, endpoint=normalized_path).observe(response_size)
-            except:
-                pass
-            
-        except Exception as e:
-            ERROR_RATE.labels(error_type='request_processing').inc()
-            raise
-        finally:
-            decrement_concurrent_requests()
-            
-            # Atualizar métricas de sistema periodicamente
-            if time.time() % 10 < 1:  # A cada ~10 segundos
-                update_system_metrics()
-        
-        return response
+IMPORTS_SECONDS = time.perf_counter() - IMPORTS_STARTED
+if SETTINGS_LOAD_STARTED >= IMPORTS_STARTED:
+    # Settings carregadas durante estes imports: não contar duas vezes
+    IMPORTS_SECONDS -= SETTINGS_LOAD_SECONDS
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -94,138 +48,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Prometheus middleware
-app.add_middleware(PrometheusMiddleware)
-
-@app.get("/metrics")
-async def metrics():
-    # Atualizar métricas de sistema antes de retornar
-    update_system_metrics()
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
-
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_STR)
+# Compressão (interna ao Prometheus, que mede o tamanho antes e depois dela)
+app.add_middleware(CompressionMiddleware)
 
-@app.get("/")
-async def root():
-    return {"message": "Backend Comparison - Python Version"}
-
-@app.on_event("startup")
-async def startup():
-    global _startup_time
-    startup_start = time.time()
-    
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Configurar métricas iniciais
-    update_system_metrics()
-    
-    # Registrar tempo de startup
-    startup_duration = time.time() - startup_start
-    STARTUP_TIME.set(startup_duration)
-    
-    print(f"Application started in {startup_duration:.3f} seconds")
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
-_startup_time = time.time()
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
-_startup_time = time.time()
-
-# Função para normalizar endpoints com IDs
-def normalize_endpoint(path: str) -> str:
-    # Padrão para endpoints com IDs numéricos
-    patterns = [
-        r'/api/v1/products/\d+',
-        r'/api/v1/orders/\d+',
-        r'/api/v1/inventory/\d+'
-    ]
-    
-    # Substituir o padrão específico por uma versão normalizada
-    for pattern in patterns:
-        if re.match(pattern, path):
-            # Extrair a parte base do endpoint e adicionar /{id}
-            base_path = path.rsplit('/', 1)[0]
-            return f"{base_path}/{{id}}"
-    
-    return path
-
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        method = request.method
-        path = request.url.path
-        
-        # Normalizar o caminho para métricas
-        normalized_path = normalize_endpoint(path)
-        
-        # Métricas de request
-        increment_concurrent_requests()
-        
-        # Tamanho do request
-        try:
-            content_length = int(request.headers.get('content-length', 0))
-            REQUEST_SIZE.labels(method=method, endpoint=normalized_path).observe(content_length)
-        except:
-            pass
-        
-        start_time = time.time()
-        
-        try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-            
-            status_code = response.status_code
-            REQUEST_COUNT.labels(method=method, endpoint=normalized_path, http_status=status_code).inc()
-            REQUEST_LATENCY.labels(method=method, endpoint=normalized_path).observe(duration)
-            
-            # Tamanho da response
-            try:
-                response_size = len(response.body) if hasattr(response, 'body') else 0
-                RESPONSE_SIZE.labels(method=method, endpoint=normalized_path).observe(response_size)
-            except:
-                pass
-            
-        except Exception as e:
-            ERROR_RATE.labels(error_type='request_processing').inc()
-            raise
-        finally:
-            decrement_concurrent_requests()
-            
-            # Atualizar métricas de sistema periodicamente
-            if time.time() % 10 < 1:  # A cada ~10 segundos
-                update_system_metrics()
-        
-        return response
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    description="API para comparação de performance entre Python e Node.js"
-)
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Profiler por amostragem (opt-in); externo à compressão, que também entra nas amostras
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
 
 # Prometheus middleware
 app.add_middleware(PrometheusMiddleware)
 
+@app.exception_handler(PasswordHashQueueFull)
+async def password_hash_queue_full_handler(request: Request, exc: PasswordHashQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many concurrent authentication requests"},
+        headers={"Retry-After": "1"},
+    )
+
+# Scrape dentro do cluster: comprimir só gastaria CPU do worker medido nos benchmarks
 @app.get("/metrics")
+@skip_compression
 async def metrics():
-    # Atualizar métricas de sistema antes de retornar
-    update_system_metrics()
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # Métricas de sistema vêm da última amostra do sampler em background
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/profile", response_class=PlainTextResponse, include_in_schema=False)
+async def debug_profile(
+    endpoint: Optional[str] = None,
+    x_profiler_token: Optional[str] = Header(None),
+):
+    """Folded stacks of the slow requests kept by the profiler (flamegraph.pl/speedscope input)."""
+    check_profiler_token(x_profiler_token)
+    return PlainTextResponse(profiler.folded(endpoint))
+
+@app.delete("/debug/profile", include_in_schema=False)
+async def clear_debug_profile(x_profiler_token: Optional[str] = Header(None)):
+    check_profiler_token(x_profiler_token)
+    profiler.clear()
+    return Response(status_code=204)
+
+def check_profiler_token(token: Optional[str]) -> None:
+    # Sem profiler ou sem token configurado, a rota não existe para o cliente
+    if not settings.PROFILER_ENABLED or not settings.PROFILER_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), settings.PROFILER_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profiler token")
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -236,20 +107,62 @@ async def root():
 
 @app.on_event("startup")
 async def startup():
-    global _startup_time
-    startup_start = time.time()
-    
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Configurar métricas iniciais
-    update_system_metrics()
-    
-    # Registrar tempo de startup
-    startup_duration = time.time() - startup_start
+    phases = {"imports": IMPORTS_SECONDS, "settings": SETTINGS_LOAD_SECONDS}
+
+    # O schema é aplicado fora daqui (alembic upgrade head); só confere a revisão
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        phases["engine_connect"] = time.perf_counter() - started
+        started = time.perf_counter()
+        check_schema_version(connection)
+        phases["schema_check"] = time.perf_counter() - started
+
+    # Conexões abertas antes da primeira requisição, nos engines que atendem os handlers
+    started = time.perf_counter()
+    warmup = settings.DB_POOL_SIZE if settings.DB_POOL_WARMUP is None else settings.DB_POOL_WARMUP
+    if async_engine is not None:
+        for pool_engine in [async_engine, *async_replica_engines]:
+            await warm_async_pool(pool_engine, warmup)
+    else:
+        for pool_engine in [engine, *replica_engines]:
+            warm_pool(pool_engine, warmup)
+    phases["pool_warmup"] = time.perf_counter() - started
+
+    # Amostragem de métricas de sistema fora do caminho das requisições
+    app.state.system_metrics_task = asyncio.create_task(
+        run_system_metrics_sampler(settings.SYSTEM_METRICS_INTERVAL_SECONDS)
+    )
+
+    # O limiter é por event loop: configurado aqui, no loop que atende as requisições
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    app.state.runtime_probe_tasks = [
+        asyncio.create_task(run_event_loop_lag_probe(settings.RUNTIME_PROBE_INTERVAL_SECONDS)),
+        asyncio.create_task(run_threadpool_probe(settings.RUNTIME_PROBE_INTERVAL_SECONDS)),
+    ]
+    if settings.PROFILER_ENABLED:
+        profiler.start()
+
+    # Registrar tempo de startup, total e por fase
+    for phase, duration in phases.items():
+        STARTUP_PHASE_DURATION.labels(phase=phase).set(duration)
+    startup_duration = sum(phases.values())
     STARTUP_TIME.set(startup_duration)
-    
-    print(f"Application started in {startup_duration:.3f} seconds")
+    app.state.startup_phases = phases
+
+    breakdown = ", ".join(f"{phase} {duration:.3f}s" for phase, duration in phases.items())
+    print(f"Application started in {startup_duration:.3f} seconds ({breakdown})")
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.system_metrics_task.cancel()
+    for task in app.state.runtime_probe_tasks:
+        task.cancel()
+    profiler.stop()
+    shutdown_hash_executor()
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in async_replica_engines:
+        await replica.dispose()
 
 if __name__ == "__main__":
     import uvicorn
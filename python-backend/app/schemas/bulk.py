@@ -0,0 +1,18 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class BulkRowResult(BaseModel):
+    index: int  # Position of the row in the request body
+    ok: bool
+    id: Optional[int] = None
+    product_id: Optional[int] = None
+    quantity: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkRowResult]
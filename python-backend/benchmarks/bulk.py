@@ -0,0 +1,100 @@
+"""
+Rows/sec of the bulk endpoints against the single-row endpoints.
+
+Creates ``--rows`` products through ``POST /products/`` (one request per
+row, ``--concurrency`` in flight) and through ``POST /products/bulk`` (JSON
+array and NDJSON, ``--chunk`` rows per request), then adds stock to each of
+them through ``POST /inventory/add`` and ``POST /inventory/bulk``:
+
+    python -m benchmarks.bulk --rows 5000 --chunk 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from benchmarks.common import make_client, run_load, seed_user, start_app
+
+
+def product(prefix: str, i: int) -> dict:
+    return {"name": f"Product {i}", "description": "Bulk benchmark", "price": 10.0, "sku": f"{prefix}-{i}"}
+
+
+async def single_rows(client, headers, path: str, rows: list, concurrency: int) -> float:
+    result = await run_load(lambda i: client.post(path, json=rows[i], headers=headers), len(rows), concurrency)
+    assert result["errors"] == 0, f"{result['errors']} failed requests on {path}"
+    return result["ops_per_sec"]
+
+
+async def bulk_rows(client, headers, path: str, rows: list, chunk: int, ndjson: bool) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(rows), chunk):
+        part = rows[offset:offset + chunk]
+        if ndjson:
+            response = await client.post(
+                path, content="\n".join(json.dumps(row) for row in part),
+                headers={**headers, "Content-Type": "application/x-ndjson"},
+            )
+        else:
+            response = await client.post(path, json=part, headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["failed"] == 0, response.json()["results"][:3]
+    return len(rows) / (time.perf_counter() - start)
+
+
+def created_ids(prefix: str) -> list:
+    from sqlalchemy import select
+
+    from app.db.database import SessionLocal
+    from app.db.models import Product
+
+    with SessionLocal() as db:
+        return list(db.execute(
+            select(Product.id).where(Product.sku.like(f"{prefix}-%")).order_by(Product.id)
+        ).scalars())
+
+
+async def measure(args) -> list:
+    app = await start_app()
+    headers = seed_user()
+    report = []
+    async with make_client(app) as client:
+        prefixes = {}
+        for name, run in (
+            ("single", lambda rows: single_rows(client, headers, "/api/v1/products/", rows, args.concurrency)),
+            ("bulk json", lambda rows: bulk_rows(client, headers, "/api/v1/products/bulk", rows, args.chunk, False)),
+            ("bulk ndjson", lambda rows: bulk_rows(client, headers, "/api/v1/products/bulk", rows, args.chunk, True)),
+        ):
+            prefix = uuid.uuid4().hex[:8]
+            prefixes[name] = prefix
+            rate = await run([product(prefix, i) for i in range(args.rows)])
+            report.append(("products", name, rate))
+
+        for name, run in (
+            ("single", lambda rows: single_rows(client, headers, "/api/v1/inventory/add", rows, args.concurrency)),
+            ("bulk json", lambda rows: bulk_rows(client, headers, "/api/v1/inventory/bulk", rows, args.chunk, False)),
+            ("bulk ndjson", lambda rows: bulk_rows(client, headers, "/api/v1/inventory/bulk", rows, args.chunk, True)),
+        ):
+            ids = created_ids(prefixes[name])
+            rate = await run([{"product_id": product_id, "quantity": 5} for product_id in ids])
+            report.append(("inventory", name, rate))
+    await app.router.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk", type=int, default=1000, help="rows per bulk request")
+    parser.add_argument("--concurrency", type=int, default=16, help="single-row requests in flight")
+    args = parser.parse_args()
+
+    report = asyncio.run(measure(args))
+    print(f"{'resource':<10} {'mode':<12} {'rows/sec':>10}")
+    for resource, mode, rate in report:
+        print(f"{resource:<10} {mode:<12} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
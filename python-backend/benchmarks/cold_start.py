@@ -0,0 +1,55 @@
+"""
+Cold-start time per phase, over fresh interpreter processes.
+
+Applies pending migrations once, then starts ``--runs`` new Python
+processes that each import ``app.main`` and run its startup handlers, the
+same work a new gunicorn worker or pod does before serving. Reports the
+median and worst duration of every startup phase and the wall time from
+spawning the process to the end of startup:
+
+    python -m benchmarks.cold_start --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import asyncio, json
+from app.main import app
+asyncio.run(app.router.startup())
+print(json.dumps(app.state.startup_phases))
+asyncio.run(app.router.shutdown())
+"""
+
+
+def run_once() -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], check=True, capture_output=True, text=True
+    ).stdout
+    wall = time.perf_counter() - start
+    phases = json.loads(output.strip().splitlines()[-1])
+    phases["process_wall"] = wall
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.db.schema import upgrade
+
+    upgrade()
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'phase':<16} {'median ms':>10} {'max ms':>10}")
+    for phase in runs[0]:
+        samples = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<16} {statistics.median(samples):>10.1f} {max(samples):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
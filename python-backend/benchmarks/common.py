@@ -0,0 +1,173 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The benchmarks drive ``app.main:app`` in-process through httpx's ASGI
+transport, against the database configured by DATABASE_URL. Run them from
+the python-backend directory, e.g. ``python -m benchmarks.db_mode``.
+"""
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "ops_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def start_app():
+    """Apply pending migrations, import the app and run its startup handlers."""
+    from app.db.schema import upgrade
+
+    upgrade()
+    from app.main import app
+
+    await app.router.startup()
+    return app
+
+
+def make_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(app=app, base_url="http://bench", timeout=None)
+
+
+def seed_user() -> Dict[str, str]:
+    """
+    Create a user directly in the database and return auth headers for it.
+
+    The password hash is a placeholder: benchmarks never go through bcrypt
+    unless they measure the login endpoint explicitly.
+    """
+    from app.core import security
+    from app.db.database import SessionLocal
+    from app.db.models import User
+
+    db = SessionLocal()
+    try:
+        user = User(
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            hashed_password="!",
+            full_name="Benchmark",
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        token = security.create_access_token(user.id)
+        return {"Authorization": f"Bearer {token}", "X-User-Id": str(user.id)}
+    finally:
+        db.close()
+
+
+def seed_products(count: int, owner_id: int, with_inventory: int = 0) -> List[int]:
+    """Insert ``count`` products (and optionally inventory rows) in batches."""
+    from sqlalchemy import insert, select
+
+    from app.db.database import engine
+    from app.db.models import InventoryItem, Product
+
+    prefix = uuid.uuid4().hex[:8]
+    ids: List[int] = []
+    batch = 5000
+    with engine.begin() as conn:
+        for start in range(0, count, batch):
+            rows = [
+                {
+                    "name": f"Product {i}",
+                    "description": "Seeded by benchmarks",
+                    "price": 10.0 + i % 100,
+                    "sku": f"{prefix}-{i}",
+                    "owner_id": owner_id,
+                }
+                for i in range(start, min(count, start + batch))
+            ]
+            conn.execute(insert(Product), rows)
+        ids = list(conn.execute(
+            select(Product.id).where(Product.sku.like(f"{prefix}-%")).order_by(Product.id)
+        ).scalars())
+        if with_inventory:
+            for start in range(0, len(ids), batch):
+                conn.execute(insert(InventoryItem), [
+                    {"product_id": product_id, "quantity": with_inventory}
+                    for product_id in ids[start:start + batch]
+                ])
+    return ids
+
+
+def seed_orders(
+    customer_ids: List[int],
+    product_ids: List[int],
+    per_customer: int,
+    items: int,
+    deleted_product_items: bool = False,
+) -> List[int]:
+    """
+    Insert ``per_customer`` orders of ``items`` items for each customer and
+    return their ids, in order.
+
+    With ``deleted_product_items`` the last item of every order has no
+    product, as if the product had been deleted.
+    """
+    from sqlalchemy import insert, select
+
+    from app.db.database import engine
+    from app.db.models import Order, OrderItem
+
+    order_ids: List[int] = []
+    with engine.begin() as conn:
+        for start in range(0, len(customer_ids), 500):
+            chunk = customer_ids[start:start + 500]
+            conn.execute(insert(Order), [
+                {"customer_id": customer_id, "status": "pending", "total_amount": 10.0 * items}
+                for customer_id in chunk for _ in range(per_customer)
+            ])
+            chunk_ids = conn.execute(
+                select(Order.id).where(Order.customer_id.in_(chunk)).order_by(Order.id)
+            ).scalars().all()
+            conn.execute(insert(OrderItem), [
+                {"order_id": order_id, "quantity": 1, "unit_price": 10.0,
+                 "product_id": None if deleted_product_items and i == items - 1
+                 else product_ids[(order_id * 7 + i) % len(product_ids)]}
+                for order_id in chunk_ids for i in range(items)
+            ])
+            order_ids += chunk_ids
+    return sorted(order_ids)
+
+
+async def run_load(
+    request: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Issue ``total`` calls of ``request`` with at most ``concurrency`` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
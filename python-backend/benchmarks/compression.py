@@ -0,0 +1,79 @@
+"""
+Response compression: wire size and latency per encoding.
+
+Seeds ``--rows`` products, then requests a product list page and the
+product export with each installed encoding (and without compression),
+checks that every decoded body equals the uncompressed one and reports the
+bytes on the wire, the ratio and the mean latency. Exits with status 1 when
+a body does not round-trip:
+
+    python -m benchmarks.compression --rows 2000 --requests 200
+"""
+import argparse
+import asyncio
+import gzip
+import time
+
+from benchmarks.common import make_client, seed_products, seed_user, start_app
+
+
+def decoders() -> dict:
+    from app.core.compression import brotli, zstandard
+
+    available = {"identity": lambda data: data, "gzip": gzip.decompress}
+    if brotli is not None:
+        available["br"] = brotli.decompress
+    if zstandard is not None:
+        # Frames de streaming não declaram o tamanho: descomprime por stream
+        available["zstd"] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return available
+
+
+async def fetch(client, path: str, headers: dict, encoding: str) -> tuple:
+    async with client.stream("GET", path, headers={**headers, "Accept-Encoding": encoding}) as response:
+        assert response.status_code == 200, response.status_code
+        wire = b"".join([chunk async for chunk in response.aiter_raw()])
+        return response.headers.get("content-encoding", "identity"), wire
+
+
+async def measure(args) -> bool:
+    app = await start_app()
+    headers = seed_user()
+    seed_products(args.rows, int(headers["X-User-Id"]))
+    paths = {
+        "list": f"/api/v1/products/?limit={args.page_size}",
+        "export": "/api/v1/products/export?format=ndjson",
+    }
+    ok = True
+    print(f"{'route':<8} {'encoding':<9} {'wire bytes':>11} {'ratio':>7} {'ms/request':>11}")
+    async with make_client(app) as client:
+        for route, path in paths.items():
+            _, raw = await fetch(client, path, headers, "identity")
+            for encoding, decode in decoders().items():
+                applied, wire = await fetch(client, path, headers, encoding)
+                if applied != encoding or decode(wire) != raw:
+                    print(f"FAIL: {route} with {encoding} (got content-encoding {applied})")
+                    ok = False
+                    continue
+                start = time.perf_counter()
+                for _ in range(args.requests):
+                    await fetch(client, path, headers, encoding)
+                elapsed = (time.perf_counter() - start) / args.requests * 1000
+                print(f"{route:<8} {encoding:<9} {len(wire):>11} {len(raw) / len(wire):>6.1f}x {elapsed:>11.2f}")
+    await app.router.shutdown()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    if not asyncio.run(measure(args)):
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare throughput and p99 of the sync and async database modes.
+
+Each mode runs in its own interpreter because DATABASE_ASYNC is read when
+the app is imported. Requires a Postgres reachable through DATABASE_URL:
+
+    python -m benchmarks.db_mode --concurrency 64 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import make_client, run_load, seed_products, seed_user, start_app
+
+SCENARIOS = {
+    "list_products": lambda client, headers, ids, i: client.get(
+        "/api/v1/products/", params={"limit": 100}, headers=headers
+    ),
+    "get_product": lambda client, headers, ids, i: client.get(
+        f"/api/v1/products/{ids[i % len(ids)]}", headers=headers
+    ),
+    "list_inventory": lambda client, headers, ids, i: client.get(
+        "/api/v1/inventory/", params={"limit": 100}, headers=headers
+    ),
+}
+
+
+async def run_mode(args) -> dict:
+    app = await start_app()
+    headers = seed_user()
+    ids = seed_products(args.products, int(headers["X-User-Id"]), with_inventory=100)
+    results = {}
+    async with make_client(app) as client:
+        for name, scenario in SCENARIOS.items():
+            results[name] = await run_load(
+                lambda i: scenario(client, headers, ids, i),
+                total=args.requests,
+                concurrency=args.concurrency,
+            )
+    await app.router.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--mode", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    report = {}
+    for mode in ("sync", "async"):
+        env = dict(os.environ, DATABASE_ASYNC=str(mode == "async").lower())
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.db_mode", "--mode", mode,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--products", str(args.products)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        report[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'scenario':<16} {'mode':<6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in SCENARIOS:
+        for mode in ("sync", "async"):
+            r = report[mode][name]
+            print(f"{name:<16} {mode:<6} {r['ops_per_sec']:>10.1f} {r['p50_ms']:>9.2f} "
+                  f"{r['p99_ms']:>9.2f} {r['errors']:>7}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
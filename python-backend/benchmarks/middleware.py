@@ -0,0 +1,159 @@
+"""
+Microbenchmark of the metrics middleware.
+
+Calls a minimal app directly through the ASGI interface (no server, no
+database) with no middleware, with the previous BaseHTTPMiddleware based
+implementation, and with the pure ASGI PrometheusMiddleware:
+
+    python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import re
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from app.core.metrics import (
+    REQUEST_COUNT, REQUEST_LATENCY, RESPONSE_SIZE, REQUEST_SIZE,
+    ERROR_RATE, increment_concurrent_requests, decrement_concurrent_requests,
+    update_system_metrics
+)
+from app.core.middleware import PrometheusMiddleware
+
+
+def normalize_endpoint(path: str) -> str:
+    # Normalização por regex usada pelo middleware antigo
+    for pattern in (r'/api/v1/products/\d+', r'/api/v1/orders/\d+', r'/api/v1/inventory/\d+'):
+        if re.match(pattern, path):
+            return f"{path.rsplit('/', 1)[0]}/{{id}}"
+    return path
+
+
+class LegacyPrometheusMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against."""
+
+    async def dispatch(self, request: Request, call_next):
+        method = request.method
+        normalized_path = normalize_endpoint(request.url.path)
+        increment_concurrent_requests()
+        try:
+            content_length = int(request.headers.get('content-length', 0))
+            REQUEST_SIZE.labels(method=method, endpoint=normalized_path).observe(content_length)
+        except ValueError:
+            pass
+        start_time = time.time()
+        try:
+            response = await call_next(request)
+            duration = time.time() - start_time
+            REQUEST_COUNT.labels(method=method, endpoint=normalized_path, http_status=response.status_code).inc()
+            REQUEST_LATENCY.labels(method=method, endpoint=normalized_path).observe(duration)
+            response_size = len(response.body) if hasattr(response, 'body') else 0
+            RESPONSE_SIZE.labels(method=method, endpoint=normalized_path, kind="wire").observe(response_size)
+        except Exception:
+            ERROR_RATE.labels(error_type='request_processing').inc()
+            raise
+        finally:
+            decrement_concurrent_requests()
+            if time.time() % 10 < 1:
+                update_system_metrics()
+        return response
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/products/{id}")
+    async def product(id: int):
+        return {"id": id, "name": "Product", "price": 10.0, "sku": f"SKU-{id}"}
+
+    @app.get("/api/v1/export")
+    async def export():
+        async def rows():
+            for i in range(100):
+                yield b'{"id": %d, "name": "Product"}\n' % i
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def call(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    received = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Como um servidor real: só reporta desconexão depois da resposta
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return received
+
+
+async def measure(app, path: str, requests: int) -> float:
+    for _ in range(200):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def recorded_size(app, path: str):
+    # O caminho da rota de streaming não tem parâmetros: rótulo = caminho
+    histogram = RESPONSE_SIZE.labels(method="GET", endpoint=path, kind="wire")
+    before = histogram._sum.get()
+    sent = await call(app, path)
+    return sent, histogram._sum.get() - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    variants = {
+        "none": build_app(),
+        "base_http": build_app(LegacyPrometheusMiddleware),
+        "pure_asgi": build_app(PrometheusMiddleware),
+    }
+    paths = {"json": "/api/v1/products/42", "streaming": "/api/v1/export"}
+
+    print(f"{'route':<10} {'middleware':<10} {'us/req':>8} {'overhead us':>12}")
+    for route, path in paths.items():
+        baseline = asyncio.run(measure(variants["none"], path, args.requests))
+        for name, app in variants.items():
+            per_request = baseline if name == "none" else asyncio.run(measure(app, path, args.requests))
+            print(f"{route:<10} {name:<10} {per_request:>8.1f} {per_request - baseline:>12.1f}")
+
+    print("\nbytes recorded in app_response_size_bytes for one streamed response:")
+    for name in ("base_http", "pure_asgi"):
+        sent, recorded = asyncio.run(recorded_size(variants[name], paths["streaming"]))
+        print(f"  {name:<10} sent={sent} recorded={recorded:.0f}")
+
+
+if __name__ == "__main__":
+    main()
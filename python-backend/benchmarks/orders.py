@@ -0,0 +1,94 @@
+"""
+Concurrent order creation: orders/sec and an oversell check.
+
+Seeds a few products with a small stock each, then places many concurrent
+orders against them, so most products run out while orders are still in
+flight. Afterwards the stock left plus the quantities in the stored orders
+must equal the seeded stock for every product, and no stock may be
+negative. Exits with status 1 on oversell:
+
+    python -m benchmarks.orders --concurrency 32 --orders 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+from collections import Counter
+
+from benchmarks.common import make_client, run_load, seed_products, seed_user, start_app
+
+
+def check_stock(product_ids: list, stock: int) -> list:
+    from sqlalchemy import func, select
+
+    from app.db.database import SessionLocal
+    from app.db.models import InventoryItem, OrderItem
+
+    with SessionLocal() as db:
+        left = dict(db.execute(
+            select(InventoryItem.product_id, InventoryItem.quantity)
+            .where(InventoryItem.product_id.in_(product_ids))
+        ).all())
+        sold = dict(db.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.product_id.in_(product_ids))
+            .group_by(OrderItem.product_id)
+        ).all())
+    problems = []
+    for product_id in product_ids:
+        quantity, ordered = left[product_id], sold.get(product_id, 0)
+        if quantity < 0 or quantity + ordered != stock:
+            problems.append((product_id, quantity, ordered))
+    return problems
+
+
+async def measure(args) -> bool:
+    app = await start_app()
+    headers = seed_user()
+    product_ids = seed_products(args.products, int(headers["X-User-Id"]), with_inventory=args.stock)
+    rng = random.Random(args.seed)
+    statuses: Counter = Counter()
+
+    async with make_client(app) as client:
+        async def place(i):
+            items = [
+                {"product_id": product_id, "quantity": rng.randint(1, 3), "unit_price": 10.0}
+                for product_id in rng.sample(product_ids, min(args.items, len(product_ids)))
+            ]
+            response = await client.post("/api/v1/orders/", json={"items": items}, headers=headers)
+            statuses[response.status_code] += 1
+            return response
+
+        result = await run_load(place, args.orders, args.concurrency)
+    await app.router.shutdown()
+
+    placed_per_sec = result["ops_per_sec"] * statuses[200] / result["requests"]
+    print(f"requests: {result['requests']}  concurrency: {args.concurrency}  "
+          f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"orders placed/sec: {placed_per_sec:.1f}  "
+          f"requests/sec: {result['ops_per_sec']:.1f}  "
+          f"p50: {result['p50_ms']:.2f}ms  p95: {result['p95_ms']:.2f}ms  p99: {result['p99_ms']:.2f}ms")
+
+    problems = check_stock(product_ids, args.stock)
+    for product_id, quantity, ordered in problems:
+        print(f"OVERSELL product {product_id}: stock left {quantity} + ordered {ordered} != {args.stock}")
+    if not problems:
+        print("no oversell")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=100, help="initial stock per product")
+    parser.add_argument("--items", type=int, default=3, help="products per order")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if not asyncio.run(measure(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
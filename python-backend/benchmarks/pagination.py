@@ -0,0 +1,74 @@
+"""
+Page latency against page depth: offset versus keyset (cursor) pagination.
+
+Seeds a large product table, then fetches the same page through
+``?skip=`` and through ``?cursor=`` at increasing depths. Offset pages get
+slower as the depth grows; keyset pages should stay flat:
+
+    python -m benchmarks.pagination --rows 200000 --repeat 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import make_client, percentile, seed_products, seed_user, start_app
+
+PATH = "/api/v1/products/"
+
+
+async def measure(args) -> list:
+    from sqlalchemy import func, select
+
+    from app.api.pagination import encode_cursor
+    from app.db.database import SessionLocal
+    from app.db.models import Product
+
+    app = await start_app()
+    headers = seed_user()
+    ids = seed_products(args.rows, int(headers["X-User-Id"]))
+    with SessionLocal() as db:
+        # Linhas de execuções anteriores ficam antes das semeadas agora
+        before = db.execute(select(func.count()).where(Product.id < ids[0])).scalar_one()
+
+    depths = [d for d in args.depths if d < len(ids)]
+    rows = []
+    async with make_client(app) as client:
+        for depth in depths:
+            offset_params = {"skip": before + depth, "limit": args.limit}
+            # O cursor guarda o último id da página anterior
+            last_id = ids[depth - 1] if depth else ids[0] - 1
+            cursor_params = {"cursor": encode_cursor(last_id), "limit": args.limit}
+            result = {"depth": depth}
+            for mode, params in (("offset", offset_params), ("keyset", cursor_params)):
+                response = await client.get(PATH, params=params, headers=headers)
+                assert response.status_code == 200, response.text
+                assert response.json()[0]["id"] == ids[depth], (mode, depth)
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    await client.get(PATH, params=params, headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                result[mode] = (percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000)
+            rows.append(result)
+    await app.router.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+",
+                        default=[0, 1000, 10000, 50000, 100000, 150000, 199000])
+    args = parser.parse_args()
+
+    rows = asyncio.run(measure(args))
+    print(f"{'depth':>8} {'offset p50':>11} {'offset p95':>11} {'keyset p50':>11} {'keyset p95':>11}")
+    for row in rows:
+        print(f"{row['depth']:>8} {row['offset'][0]:>9.2f}ms {row['offset'][1]:>9.2f}ms "
+              f"{row['keyset'][0]:>9.2f}ms {row['keyset'][1]:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Sampling profiler overhead and output check.
+
+Runs the same load (product pages, single products and order pages) in two
+fresh processes, with the profiler disabled and enabled, and reports the
+throughput and latency of each plus the profiler's own sampling cost. In
+the profiled run every request counts as slow, so all of them are kept.
+Exits with status 1 when sampling used more CPU than PROFILER_MAX_OVERHEAD
+allows, when ``/debug/profile`` accepts a request without the token or
+when the folded output has no frame from the handlers:
+
+    python -m benchmarks.profiler --requests 3000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+TOKEN = "benchmark-token"
+
+
+async def child(args) -> dict:
+    from prometheus_client import REGISTRY
+
+    from benchmarks.common import make_client, run_load, seed_products, seed_user, start_app
+    from app.core.config import settings
+
+    app = await start_app()
+    headers = seed_user()
+    product_ids = seed_products(args.rows, int(headers["X-User-Id"]))
+    paths = [
+        lambda i: ("/api/v1/products/", {"limit": 50}),
+        lambda i: (f"/api/v1/products/{product_ids[i % len(product_ids)]}", {}),
+        lambda i: ("/api/v1/orders/", {"limit": 20}),
+    ]
+    report = {}
+    async with make_client(app) as client:
+        async def request(i):
+            path, params = paths[i % len(paths)](i)
+            return await client.get(path, params=params, headers=headers)
+
+        report["load"] = await run_load(request, args.requests, args.concurrency)
+        if settings.PROFILER_ENABLED:
+            sampled = REGISTRY.get_sample_value("app_profiler_sample_duration_seconds_sum") or 0.0
+            report["sample_passes"] = REGISTRY.get_sample_value("app_profiler_sample_duration_seconds_count")
+            elapsed = report["load"]["requests"] / report["load"]["ops_per_sec"]
+            report["sampling_cpu_ratio"] = sampled / elapsed
+            report["unauthorized_status"] = (await client.get("/debug/profile")).status_code
+            profile = await client.get("/debug/profile", headers={"X-Profiler-Token": TOKEN})
+            report["profile_status"] = profile.status_code
+            report["stacks"] = len(profile.text.splitlines())
+            report["handler_frames"] = sum(
+                "read_product" in line or "read_orders" in line for line in profile.text.splitlines()
+            )
+    await app.router.shutdown()
+    return report
+
+
+def run_child(args, enabled: bool) -> dict:
+    env = dict(os.environ, PROFILER_ENABLED=str(enabled).lower())
+    if enabled:
+        env.update(PROFILER_TOKEN=TOKEN, PROFILER_SLOW_REQUEST_SECONDS="0")
+    command = [sys.executable, "-m", "benchmarks.profiler", "--child",
+               "--rows", str(args.rows), "--requests", str(args.requests),
+               "--concurrency", str(args.concurrency)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(child(args))))
+        return
+
+    from app.core.config import settings
+    from app.db.schema import upgrade
+
+    upgrade()
+    off, on = run_child(args, False), run_child(args, True)
+    print(f"{'profiler':<9} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, report in (("off", off), ("on", on)):
+        load = report["load"]
+        print(f"{name:<9} {load['ops_per_sec']:>9.0f} {load['p50_ms']:>8.2f} {load['p99_ms']:>8.2f} {load['errors']:>7}")
+    print(f"throughput change {on['load']['ops_per_sec'] / off['load']['ops_per_sec'] - 1:+.1%}; "
+          f"{on['sample_passes']:.0f} sampling passes using {on['sampling_cpu_ratio']:.2%} of a CPU; "
+          f"{on['stacks']} folded stacks kept")
+
+    ok = True
+    if on["sampling_cpu_ratio"] > settings.PROFILER_MAX_OVERHEAD:
+        print(f"FAIL: sampling over PROFILER_MAX_OVERHEAD ({settings.PROFILER_MAX_OVERHEAD:.0%})")
+        ok = False
+    if on["unauthorized_status"] != 403 or on["profile_status"] != 200:
+        print(f"FAIL: /debug/profile returned {on['unauthorized_status']} without token, "
+              f"{on['profile_status']} with it")
+        ok = False
+    if not on["handler_frames"]:
+        print("FAIL: no handler frame in the folded stacks")
+        ok = False
+    if not ok:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
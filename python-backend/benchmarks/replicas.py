@@ -0,0 +1,115 @@
+"""
+Read-replica routing check.
+
+Needs DATABASE_REPLICA_URIS (two PostgreSQL instances with streaming
+replication, or just two SQLite files, whose "replica" never receives the
+writes). Creates a product and reads it back at once, which must be served
+by the primary (read-your-writes); after READ_YOUR_WRITES_SECONDS the same
+reads must go to a replica. Prints the statements and mean latency recorded
+per engine and exits with status 1 when a read was routed wrongly:
+
+    DATABASE_REPLICA_URIS=sqlite:///replica.db DATABASE_URI=sqlite:///primary.db \\
+        python -m benchmarks.replicas --migrate-replicas
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from benchmarks.common import make_client, seed_user, start_app
+
+
+def migrate_replicas() -> None:
+    """Apply the migrations to each replica (for unreplicated local databases)."""
+    from app.db.database import async_replica_engines, replica_engines
+    from app.db.schema import upgrade
+    from sqlalchemy import create_engine
+
+    engines = replica_engines or [
+        create_engine(str(engine.url).replace("+aiosqlite", "").replace("+asyncpg", ""))
+        for engine in async_replica_engines
+    ]
+    for engine in engines:
+        with engine.connect() as connection:
+            upgrade(connection=connection)
+            connection.commit()
+
+
+def routed(target: str) -> float:
+    from app.core.metrics import DB_READ_ROUTING
+
+    return DB_READ_ROUTING.labels(target=target)._value.get()
+
+
+def statements_by_engine() -> dict:
+    from app.core.metrics import DB_STATEMENT_DURATION
+
+    report = {}
+    for metric in DB_STATEMENT_DURATION.collect():
+        for sample in metric.samples:
+            engine = sample.labels["engine"]
+            if sample.name.endswith("_count"):
+                report.setdefault(engine, [0, 0.0])[0] = sample.value
+            elif sample.name.endswith("_sum"):
+                report.setdefault(engine, [0, 0.0])[1] = sample.value
+    return report
+
+
+async def measure(args) -> bool:
+    from app.core.config import settings
+
+    if not settings.DATABASE_REPLICA_URIS:
+        raise SystemExit("DATABASE_REPLICA_URIS is not set")
+    if args.migrate_replicas:
+        migrate_replicas()
+    app = await start_app()
+    headers = seed_user()
+    ok = True
+    async with make_client(app) as client:
+        response = await client.post("/api/v1/products/", headers=headers, json={
+            "name": "Replica check", "description": "", "price": 1.0, "sku": f"replica-{uuid.uuid4().hex[:8]}",
+        })
+        assert response.status_code == 200, response.text
+        product_id = response.json()["id"]
+
+        primary_before = routed("primary")
+        response = await client.get(f"/api/v1/products/{product_id}", headers=headers)
+        if response.status_code != 200 or routed("primary") != primary_before + 1:
+            print(f"FAIL: read right after the write was not served by the primary ({response.status_code})")
+            ok = False
+        else:
+            print("read right after the write: primary")
+
+        time.sleep(settings.READ_YOUR_WRITES_SECONDS + 0.1)
+        replica_before = routed("replica")
+        for _ in range(args.reads):
+            response = await client.get(f"/api/v1/products/?limit={args.page_size}", headers=headers)
+            assert response.status_code == 200, response.text
+        visible = any(row["id"] == product_id for row in response.json())
+        if routed("replica") != replica_before + args.reads:
+            print("FAIL: reads after the read-your-writes window did not go to a replica")
+            ok = False
+        else:
+            print(f"{args.reads} reads after the window: replica (write visible there: {visible})")
+    await app.router.shutdown()
+
+    print(f"{'engine':<18} {'statements':>10} {'mean ms':>8}")
+    for engine, (count, total) in sorted(statements_by_engine().items()):
+        print(f"{engine:<18} {count:>10.0f} {total / count * 1000 if count else 0:>8.2f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reads", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--migrate-replicas", action="store_true",
+                        help="apply the migrations to the replicas too (unreplicated local databases)")
+    args = parser.parse_args()
+    if not asyncio.run(measure(args)):
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
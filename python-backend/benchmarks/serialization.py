@@ -0,0 +1,91 @@
+"""
+Per-row serialization cost: FastAPI's response_model path versus the
+precompiled encoders + orjson used with FAST_JSON_RESPONSES.
+
+Builds pages of in-memory ORM objects (no database needed), renders each
+page both ways, checks that the bodies are byte-for-byte identical and
+reports the cost per row:
+
+    python -m benchmarks.serialization --rows 100 --iterations 2000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.utils import create_response_field
+
+
+def build_pages(rows: int) -> dict:
+    from app.db.models import InventoryItem, Order, OrderItem, Product
+
+    now = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    products = [
+        Product(id=i, name=f"Product {i}", description="Serialization benchmark",
+                price=9.99 + i, sku=f"SKU-{i}", owner_id=1)
+        for i in range(1, rows + 1)
+    ]
+    inventory = [
+        InventoryItem(id=i, product_id=i, quantity=i * 3, last_updated=now - timedelta(seconds=i))
+        for i in range(1, rows + 1)
+    ]
+    orders = [
+        Order(id=i, customer_id=1, status="pending", total_amount=30.0 * i,
+              created_at=now, updated_at=now,
+              items=[OrderItem(id=i * 10 + j, order_id=i, product_id=j + 1, quantity=j + 1, unit_price=10.0)
+                     for j in range(3)])
+        for i in range(1, rows + 1)
+    ]
+    return {"products": products, "inventory": inventory, "orders": orders}
+
+
+def fastapi_path(field, rows) -> bytes:
+    # O que o FastAPI 0.95 faz com response_model: valida (from_orm), jsonable_encoder, json.dumps
+    value, errors = field.validate(rows, {}, loc=("response",))
+    assert not errors, errors
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def fast_path(schema, rows) -> bytes:
+    from app.schemas.encoders import encode_many
+
+    return ORJSONResponse(encode_many(schema, rows)).body
+
+
+def per_row_us(render, iterations: int, rows: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) / (iterations * rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100, help="rows per page")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.schemas.inventory import InventoryItem as InventoryItemSchema
+    from app.schemas.order import Order as OrderSchema
+    from app.schemas.product import Product as ProductSchema
+
+    pages = build_pages(args.rows)
+    schemas = {"products": ProductSchema, "inventory": InventoryItemSchema, "orders": OrderSchema}
+    ok = True
+    print(f"{'page':<10} {'response_model us/row':>22} {'fast us/row':>12} {'speedup':>8} {'same body':>10}")
+    for name, schema in schemas.items():
+        rows = pages[name]
+        field = create_response_field(name="response", type_=List[schema])
+        same = fastapi_path(field, rows) == fast_path(schema, rows)
+        ok = ok and same
+        slow = per_row_us(lambda: fastapi_path(field, rows), args.iterations, args.rows)
+        fast = per_row_us(lambda: fast_path(schema, rows), args.iterations, args.rows)
+        print(f"{name:<10} {slow:>22.2f} {fast:>12.2f} {slow / fast:>7.1f}x {str(same):>10}")
+    if not ok:
+        raise SystemExit("fast path output differs from the response_model output")
+
+
+if __name__ == "__main__":
+    main()
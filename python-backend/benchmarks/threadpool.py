@@ -0,0 +1,127 @@
+"""
+Threadpool saturation vs event-loop lag, as seen by the runtime probes.
+
+Runs three phases against the sync product list (``DATABASE_ASYNC=false``)
+with the threadpool limited to ``--threads`` tokens and the probes running
+every 50 ms:
+
+* ``baseline``: one request at a time;
+* ``saturated``: ``--concurrency`` requests in flight, more than there are
+  threads, so requests queue for a token (keep it within the DB pool,
+  DB_POOL_SIZE + DB_MAX_OVERFLOW: a request holds its connection while it
+  waits for a thread, and beyond the pool the threads wait for connections
+  that only the waiting requests can release);
+* ``blocked loop``: one request at a time while a coroutine blocks the
+  event loop for ``--block-ms`` at a time.
+
+For each phase it reports the throughput, the p95 latency, the mean
+thread-acquisition wait and loop lag recorded by the probes, and the most
+waiting tasks seen. Exits with status 1 when the saturated phase does not
+show up as thread waits, or the blocked phase as loop lag:
+
+    python -m benchmarks.threadpool --threads 4 --concurrency 12
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.common import make_client, run_load, seed_products, seed_user, start_app
+
+
+def histogram_mean(name: str, before: dict) -> float:
+    from prometheus_client import REGISTRY
+
+    total = (REGISTRY.get_sample_value(f"{name}_sum") or 0.0) - before[f"{name}_sum"]
+    count = (REGISTRY.get_sample_value(f"{name}_count") or 0.0) - before[f"{name}_count"]
+    return total / count if count else 0.0
+
+
+def snapshot() -> dict:
+    from prometheus_client import REGISTRY
+
+    return {
+        f"{name}_{suffix}": REGISTRY.get_sample_value(f"{name}_{suffix}") or 0.0
+        for name in ("app_threadpool_acquire_wait_seconds", "app_event_loop_lag_seconds")
+        for suffix in ("sum", "count")
+    }
+
+
+async def watch_waiting(done: asyncio.Event) -> float:
+    from prometheus_client import REGISTRY
+
+    peak = 0.0
+    while not done.is_set():
+        peak = max(peak, REGISTRY.get_sample_value("app_threadpool_waiting_tasks") or 0.0)
+        await asyncio.sleep(0.01)
+    return peak
+
+
+async def block_loop(done: asyncio.Event, block_ms: float) -> None:
+    while not done.is_set():
+        time.sleep(block_ms / 1000)
+        await asyncio.sleep(block_ms / 1000)
+
+
+async def measure(args) -> bool:
+    from app.core.config import settings
+
+    if settings.DATABASE_ASYNC:
+        print("DATABASE_ASYNC=true: handlers do not use the threadpool; run with DATABASE_ASYNC=false")
+        return False
+    settings.THREADPOOL_SIZE = args.threads
+    settings.RUNTIME_PROBE_INTERVAL_SECONDS = 0.05
+    app = await start_app()
+    headers = seed_user()
+    seed_products(args.rows, int(headers["X-User-Id"]))
+
+    results = {}
+    async with make_client(app) as client:
+        async def request(i):
+            return await client.get("/api/v1/products/", params={"limit": 100}, headers=headers)
+
+        phases = [("baseline", 1, False), ("saturated", args.concurrency, False), ("blocked loop", 1, True)]
+        print(f"{'phase':<13} {'req/s':>8} {'p95 ms':>8} {'acquire ms':>11} {'loop lag ms':>12} {'max waiting':>12}")
+        for name, concurrency, blocked in phases:
+            before = snapshot()
+            done = asyncio.Event()
+            watcher = asyncio.create_task(watch_waiting(done))
+            blocker = asyncio.create_task(block_loop(done, args.block_ms)) if blocked else None
+            load = await run_load(request, args.requests, concurrency)
+            done.set()
+            if blocker is not None:
+                await blocker
+            waiting = await watcher
+            acquire = histogram_mean("app_threadpool_acquire_wait_seconds", before) * 1000
+            lag = histogram_mean("app_event_loop_lag_seconds", before) * 1000
+            results[name] = (acquire, lag, waiting)
+            print(f"{name:<13} {load['ops_per_sec']:>8.0f} {load['p95_ms']:>8.2f} {acquire:>11.2f} "
+                  f"{lag:>12.2f} {waiting:>12.0f}")
+    await app.router.shutdown()
+
+    ok = True
+    acquire, lag, waiting = results["saturated"]
+    if not waiting or acquire <= results["baseline"][0]:
+        print("FAIL: the saturated phase did not show up as tasks waiting for a thread")
+        ok = False
+    if results["blocked loop"][1] < args.block_ms / 4:
+        print("FAIL: the blocked phase did not show up as event-loop lag")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--block-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    if not asyncio.run(measure(args)):
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
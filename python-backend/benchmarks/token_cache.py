@@ -0,0 +1,82 @@
+"""
+CPU saved per request by the verified-token cache.
+
+First times the auth decode step alone (jwt.decode + TokenPayload versus a
+cache hit), then measures process CPU per request on the list endpoints
+with the token cache disabled and enabled. The endpoint part needs the
+database in DATABASE_URL:
+
+    python -m benchmarks.token_cache --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import make_client, seed_products, seed_user, start_app
+
+ENDPOINTS = ["/api/v1/products/", "/api/v1/inventory/", "/api/v1/orders/"]
+
+
+def decode_cost(token: str, calls: int) -> dict:
+    from app.api.dependencies import _decode_token
+    from app.core.cache import token_cache
+
+    result = {}
+    for enabled in (False, True):
+        token_cache.enabled = enabled
+        token_cache.clear()
+        _decode_token(token)
+        start = time.process_time()
+        for _ in range(calls):
+            _decode_token(token)
+        result[enabled] = (time.process_time() - start) / calls * 1e6
+    return result
+
+
+async def endpoint_cost(args) -> dict:
+    from app.core.cache import token_cache
+
+    app = await start_app()
+    headers = seed_user()
+    seed_products(100, int(headers["X-User-Id"]), with_inventory=10)
+    result = {}
+    async with make_client(app) as client:
+        for path in ENDPOINTS:
+            for enabled in (False, True):
+                token_cache.enabled = enabled
+                token_cache.clear()
+                await client.get(path, params={"limit": args.limit}, headers=headers)
+                start = time.process_time()
+                for _ in range(args.requests):
+                    await client.get(path, params={"limit": args.limit}, headers=headers)
+                result[(path, enabled)] = (time.process_time() - start) / args.requests * 1e6
+    await app.router.shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--skip-endpoints", action="store_true",
+                        help="only measure the decode step (no database needed)")
+    args = parser.parse_args()
+
+    from app.core import security
+
+    token = security.create_access_token(1)
+    decode = decode_cost(token, args.requests * 10)
+    print(f"auth decode step: {decode[False]:.1f} us uncached, {decode[True]:.1f} us cached "
+          f"({decode[False] - decode[True]:.1f} us saved per request)")
+    if args.skip_endpoints:
+        return
+
+    cost = asyncio.run(endpoint_cost(args))
+    print(f"\n{'endpoint':<22} {'uncached us':>12} {'cached us':>10} {'saved us':>9}")
+    for path in ENDPOINTS:
+        uncached, cached = cost[(path, False)], cost[(path, True)]
+        print(f"{path:<22} {uncached:>12.1f} {cached:>10.1f} {uncached - cached:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
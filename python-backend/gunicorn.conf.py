@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration: ``SERVER_WORKERS`` uvicorn workers behind one master.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Every worker is a separate process with its own event loop, connection pool
+and caches. Metrics are collected in prometheus_client's multiprocess mode:
+the master points PROMETHEUS_MULTIPROC_DIR at an empty directory before any
+worker starts and drops the live gauges of each worker that exits.
+"""
+import math
+import os
+import shutil
+import sys
+
+# O gunicorn carrega este arquivo antes de pôr o diretório de trabalho no sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings  # noqa: E402
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring the container's cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # cgroup v2 ("max 100000" sem limite) e v1
+    quota_files = (
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    )
+    for quota_path, period_path in quota_files:
+        try:
+            with open(quota_path) as f:
+                values = f.read().split()
+            if period_path is not None:
+                with open(period_path) as f:
+                    values.append(f.read().strip())
+        except OSError:
+            continue
+        quota, period = values[0], values[1]
+        if quota not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+        break
+    return cpus
+
+
+# PROMETHEUS_MULTIPROC_DIR precisa existir antes de os workers importarem o prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+
+bind = settings.SERVER_BIND
+workers = settings.SERVER_WORKERS or available_cpus()
+worker_class = "app.core.workers.UvicornWorker"
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+backlog = settings.SERVER_BACKLOG
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+
+def on_starting(server):
+    # Amostras de uma execução anterior seriam somadas às novas
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,67 @@
+"""
+Alembic environment. The database URL comes from ``settings.DATABASE_URI``
+and autogenerate compares against the ORM models in ``app/db/models.py``.
+
+On PostgreSQL the migration runs under an advisory lock, so starting it
+from several places at once (pods, compose services) applies it only once.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.database import Base
+import app.db.models  # noqa: F401  (registra as tabelas em Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Chave arbitrária do pg_advisory_lock das migrações
+MIGRATION_LOCK_ID = 0x5C4E4A
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=str(settings.DATABASE_URI),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection) -> None:
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+    try:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    engine = create_engine(str(settings.DATABASE_URI), poolclass=NullPool)
+    with engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,54 @@
+"""unique inventory row per product
+
+``/inventory/add`` upserts with ``ON CONFLICT (product_id)``, which needs a
+unique index. Duplicate rows left by the old read-modify-write handlers are
+merged first: the oldest row of each product keeps the summed quantity.
+Databases created by ``create_all`` after the model declared the column
+unique already have the index; for them this revision does nothing.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 07:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'ix_inventory_items_product_id'
+
+
+def upgrade() -> None:
+    existing = {
+        index['name']: index for index in sa.inspect(op.get_bind()).get_indexes('inventory_items')
+    }
+    if INDEX_NAME in existing:
+        if existing[INDEX_NAME]['unique']:
+            return
+        op.drop_index(INDEX_NAME, table_name='inventory_items')
+    op.execute(sa.text("""
+        UPDATE inventory_items SET quantity = (
+            SELECT SUM(COALESCE(duplicate.quantity, 0)) FROM inventory_items AS duplicate
+            WHERE duplicate.product_id = inventory_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM inventory_items WHERE product_id IS NOT NULL
+            GROUP BY product_id HAVING COUNT(*) > 1
+        )
+    """))
+    op.execute(sa.text("""
+        DELETE FROM inventory_items
+        WHERE product_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM inventory_items WHERE product_id IS NOT NULL GROUP BY product_id
+        )
+    """))
+    op.create_index(INDEX_NAME, 'inventory_items', ['product_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name='inventory_items')
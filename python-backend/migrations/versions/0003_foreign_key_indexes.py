@@ -0,0 +1,39 @@
+"""foreign key indexes
+
+Every order read filters orders by customer and orders them by id, and
+loads items by order id. Deleting a product loads its order items (to
+detach them) and makes PostgreSQL check the order_items foreign key, both
+by product id. inventory_items.product_id is already covered by the
+unique index of 0002. On PostgreSQL the indexes are built CONCURRENTLY, so
+existing tables keep taking writes while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 07:30:00
+"""
+from alembic import op
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_orders_customer_id_id', 'orders', ['customer_id', 'id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,192 @@
+"""
+Benchmark suite: every API route, with a JSON report to diff between commits.
+
+Seeds ``PRODUCTS`` products (with stock) and ``ORDERS`` orders for the
+module's user, then runs ``REQUESTS`` calls of each route under
+``app/api/router.py`` (fewer for login and register, which pay for bcrypt,
+and for the exports and bulk routes) with ``CONCURRENCY`` in flight, one
+test per route: reads first, and the writes that change the seeded data
+last. Each route gets the throughput, the p50/p95/p99 latency and the mean
+SQL statements per request, as ``PrometheusMiddleware`` records them.
+
+A route test fails when a request fails or, with ``--benchmark-baseline``,
+when the route now runs half a statement or more per request than in that
+report; ``test_every_route_has_a_scenario`` fails when a route is added
+without a scenario. ``--benchmark-report`` writes the report (settings of
+the run plus one entry per route, sorted keys and rounded values):
+
+    pytest tests/test_benchmark_suite.py --benchmark-report before.json
+    pytest tests/test_benchmark_suite.py --benchmark-baseline before.json --benchmark-report after.json
+"""
+import platform
+import uuid
+import warnings
+from typing import Callable, List, NamedTuple, Tuple
+
+import pytest
+
+from benchmarks.common import run_load, seed_orders, seed_products
+
+API = "/api/v1"
+PASSWORD = "benchmark-password"
+PRODUCTS = 10000
+# Pedidos semeados para o usuário do módulo
+ORDERS = 500
+# Itens por pedido semeado e criado
+ITEMS = 3
+PAGE_SIZE = 100
+REQUESTS = 300
+AUTH_REQUESTS = 20
+EXPORT_REQUESTS = 20
+BULK_REQUESTS = 20
+BULK_ROWS = 100
+CONCURRENCY = 8
+# Aumento de instruções por requisição que reprova: caminhos de conflito/retry variam
+# um pouco a média entre execuções, um N+1 soma pelo menos uma instrução por requisição
+QUERY_REGRESSION = 0.5
+# Sufixo dos e-mails/SKUs criados pela execução
+RUN = uuid.uuid4().hex[:8]
+
+
+class SuiteData(NamedTuple):
+    product_ids: List[int]
+    # Um produto por requisição de DELETE
+    doomed_ids: List[int]
+    order_ids: List[int]
+    email: str
+
+
+class Scenario(NamedTuple):
+    method: str
+    # Template da rota, como no rótulo "endpoint" das métricas
+    path: str
+    # (dados, i) -> (caminho, kwargs do httpx) da i-ésima requisição
+    build: Callable[[SuiteData, int], Tuple[str, dict]]
+    requests: int = REQUESTS
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {API}{self.path}"
+
+
+def product(data: SuiteData, i: int) -> int:
+    return data.product_ids[(i * 7919) % len(data.product_ids)]
+
+
+def order_items(data: SuiteData, i: int) -> list:
+    return [{"product_id": product(data, i + k), "quantity": 1, "unit_price": 10.0} for k in range(ITEMS)]
+
+
+SCENARIOS = [
+    Scenario("GET", "/products/", lambda d, i: ("/products/", {"params": {"limit": PAGE_SIZE}})),
+    Scenario("GET", "/products/{id}", lambda d, i: (f"/products/{product(d, i)}", {})),
+    Scenario("GET", "/products/export", lambda d, i: ("/products/export", {}), EXPORT_REQUESTS),
+    Scenario("GET", "/inventory/", lambda d, i: ("/inventory/", {"params": {"limit": PAGE_SIZE}})),
+    Scenario("GET", "/orders/", lambda d, i: ("/orders/", {"params": {"limit": PAGE_SIZE}})),
+    Scenario("GET", "/orders/{id}", lambda d, i: (f"/orders/{d.order_ids[i % len(d.order_ids)]}", {})),
+    Scenario("GET", "/orders/export", lambda d, i: ("/orders/export", {}), EXPORT_REQUESTS),
+    Scenario("POST", "/auth/login", lambda d, i: ("/auth/login", {
+        "data": {"username": d.email, "password": PASSWORD},
+    }), AUTH_REQUESTS),
+    Scenario("POST", "/auth/register", lambda d, i: ("/auth/register", {
+        "json": {"email": f"suite-{RUN}-{i}@example.com", "password": PASSWORD, "full_name": "Suite"},
+    }), AUTH_REQUESTS),
+    Scenario("POST", "/products/", lambda d, i: ("/products/", {
+        "json": {"name": f"Suite {i}", "price": 10.0, "sku": f"suite-{RUN}-{i}"},
+    })),
+    Scenario("PUT", "/products/{id}", lambda d, i: (f"/products/{product(d, i)}", {"json": {"price": 10.0 + i % 50}})),
+    Scenario("POST", "/products/bulk", lambda d, i: ("/products/bulk", {"json": [
+        {"name": f"Bulk {i}-{k}", "price": 10.0, "sku": f"suite-{RUN}-bulk-{i}-{k}"} for k in range(BULK_ROWS)
+    ]}), BULK_REQUESTS),
+    Scenario("POST", "/inventory/add", lambda d, i: ("/inventory/add", {
+        "json": {"product_id": product(d, i), "quantity": 2},
+    })),
+    Scenario("POST", "/inventory/remove", lambda d, i: ("/inventory/remove", {
+        "json": {"product_id": product(d, i), "quantity": 1},
+    })),
+    Scenario("POST", "/inventory/bulk", lambda d, i: ("/inventory/bulk", {"json": [
+        {"product_id": product(d, i * BULK_ROWS + k), "quantity": 1} for k in range(BULK_ROWS)
+    ]}), BULK_REQUESTS),
+    Scenario("POST", "/orders/", lambda d, i: ("/orders/", {"json": {"items": order_items(d, i)}})),
+    Scenario("DELETE", "/products/{id}", lambda d, i: (f"/products/{d.doomed_ids[i]}", {})),
+]
+
+
+@pytest.fixture(scope="module")
+def suite_data(run, client, headers, benchmark_report, benchmark_baseline) -> SuiteData:
+    from sqlalchemy import insert
+
+    from app.core import security
+    from app.core.config import settings
+    from app.db.database import engine
+    from app.db.models import User
+
+    benchmark_report["settings"] = {
+        "database": engine.dialect.name,
+        "database_async": settings.DATABASE_ASYNC,
+        "python": platform.python_version(),
+        "products": PRODUCTS,
+        "orders": ORDERS,
+        "items_per_order": ITEMS,
+        "page_size": PAGE_SIZE,
+        "bulk_rows": BULK_ROWS,
+        "concurrency": CONCURRENCY,
+    }
+    if benchmark_baseline is not None and benchmark_baseline["settings"] != benchmark_report["settings"]:
+        warnings.warn("the benchmark baseline was run with different settings")
+
+    user_id = int(headers["X-User-Id"])
+    # Estoque de sobra: add/remove, pedidos e ajustes em lote nunca ficam sem itens
+    product_ids = seed_products(PRODUCTS, user_id, with_inventory=1_000_000)
+    doomed_ids = seed_products(REQUESTS, user_id)
+    order_ids = seed_orders([user_id], product_ids, ORDERS, ITEMS)
+    # Usuário com senha de verdade para o login (um único bcrypt aqui)
+    email = f"suite-{RUN}@example.com"
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "email": email, "hashed_password": security.get_password_hash(PASSWORD),
+            "full_name": "Suite", "is_active": True,
+        }])
+    # Aquece os caches de token/usuário antes de medir
+    run(client.get(f"{API}/orders/", params={"limit": 1}, headers=headers))
+    return SuiteData(product_ids, doomed_ids, order_ids, email)
+
+
+def test_every_route_has_a_scenario(app):
+    from fastapi.routing import APIRoute
+
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith(API)
+        for method in route.methods
+    }
+    assert sorted(routes - {scenario.name for scenario in SCENARIOS}) == []
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda scenario: scenario.name)
+def test_route(run, client, headers, suite_data, recorded_queries, benchmark_report, benchmark_baseline, scenario):
+    async def request(i):
+        path, kwargs = scenario.build(suite_data, i)
+        return await client.request(scenario.method, API + path, headers=headers, **kwargs)
+
+    load = run(run_load(request, scenario.requests, CONCURRENCY))
+    counts = [
+        queries.count for method, endpoint, queries in recorded_queries
+        if (method, endpoint) == (scenario.method, API + scenario.path)
+    ]
+    row = benchmark_report["routes"][scenario.name] = {
+        "requests": load["requests"],
+        "errors": load["errors"],
+        "ops_per_sec": round(load["ops_per_sec"], 1),
+        "p50_ms": round(load["p50_ms"], 3),
+        "p95_ms": round(load["p95_ms"], 3),
+        "p99_ms": round(load["p99_ms"], 3),
+        "queries_per_request": round(sum(counts) / len(counts), 2) if counts else 0.0,
+    }
+
+    assert row["errors"] == 0
+    before = (benchmark_baseline or {"routes": {}})["routes"].get(scenario.name)
+    if before is not None:
+        assert row["queries_per_request"] - before["queries_per_request"] < QUERY_REGRESSION, \
+            f"{before['queries_per_request']:g} -> {row['queries_per_request']:g} statements per request"
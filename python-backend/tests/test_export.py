@@ -0,0 +1,101 @@
+"""
+Streaming export memory budget.
+
+Seeds a million products, then streams ``GET /products/export`` in each
+format through the ASGI interface, discarding every chunk as it arrives,
+while a background thread samples the process RSS. The peak may not grow
+more than ``BUDGET_MB`` over the RSS measured just before the export: rows
+are read from a server-side cursor in EXPORT_BATCH_SIZE batches, so the
+memory used depends on the batch size and not on the table size.
+"""
+import asyncio
+import gc
+import threading
+import time
+
+import psutil
+import pytest
+
+from benchmarks.common import seed_products
+
+ROWS = 1_000_000
+BUDGET_MB = 64
+
+
+class RSSSampler(threading.Thread):
+    def __init__(self, interval: float = 0.01) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+        self._process = psutil.Process()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+async def export(app, headers: dict, format: str) -> tuple:
+    """Call the export route over ASGI, counting lines and bytes without keeping them."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "server": ("test", 80), "client": ("test", 1),
+        "path": "/api/v1/products/export", "raw_path": b"/api/v1/products/export",
+        "root_path": "", "query_string": f"format={format}".encode(),
+        "headers": [(b"authorization", headers["Authorization"].encode()), (b"host", b"test")],
+    }
+    done = asyncio.Event()
+    status, lines, size = 0, 0, 0
+
+    async def receive():
+        if not done.is_set():
+            await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, lines, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            lines += body.count(b"\n")
+            size += len(body)
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, lines, size
+
+
+@pytest.fixture(scope="module")
+def products(headers):
+    owner_id = int(headers["X-User-Id"])
+    # Em blocos, para não manter a lista de ids de um milhão de linhas
+    for start in range(0, ROWS, 100000):
+        seed_products(min(100000, ROWS - start), owner_id)
+    return ROWS
+
+
+@pytest.mark.parametrize("format, header_lines", [("ndjson", 0), ("csv", 1)])
+def test_export_streams_within_rss_budget(run, app, headers, products, format, header_lines):
+    gc.collect()
+    baseline = psutil.Process().memory_info().rss
+    sampler = RSSSampler()
+    sampler.start()
+    try:
+        status, lines, size = run(export(app, headers, format))
+    finally:
+        peak = sampler.stop()
+
+    growth_mb = (peak - baseline) / 2 ** 20
+    print(f"{format}: {lines} lines, {size / 2 ** 20:.1f} MiB; RSS baseline "
+          f"{baseline / 2 ** 20:.1f} MiB, growth {growth_mb:.1f} MiB (budget {BUDGET_MB} MiB)")
+    assert status == 200
+    assert lines == products + header_lines
+    assert growth_mb <= BUDGET_MB
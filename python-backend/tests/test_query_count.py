@@ -0,0 +1,56 @@
+"""
+SQL statements per request for the order reads.
+
+Orders are seeded with several items each, the last one pointing to a
+deleted product. A page of orders, whatever its size, and a single order
+take one statement for the orders and one for all their items
+(``selectinload``); an N+1 over orders or items makes the count grow with
+the page. Items without a product are never returned.
+"""
+import pytest
+
+from benchmarks.common import seed_orders, seed_products
+
+ITEMS = 4
+PAGE_SIZES = (1, 10, 50)
+# Pedidos + itens de todos eles
+READ_STATEMENTS = 2
+
+
+@pytest.fixture(scope="module")
+def order_ids(run, client, headers):
+    customer_id = int(headers["X-User-Id"])
+    product_ids = seed_products(ITEMS, customer_id)
+    order_ids = seed_orders([customer_id], product_ids, max(PAGE_SIZES), ITEMS, deleted_product_items=True)
+    # Aquece os caches de token/usuário: só as instruções do handler são contadas
+    run(client.get("/api/v1/orders/", params={"limit": 1}, headers=headers))
+    return order_ids
+
+
+def assert_items(orders: list) -> None:
+    for order in orders:
+        assert len(order["items"]) == ITEMS - 1
+        assert all(item["product_id"] is not None for item in order["items"])
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_order_page_statements(run, client, headers, order_ids, recorded_queries, limit):
+    response = run(client.get("/api/v1/orders/", params={"limit": limit}, headers=headers))
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == limit
+    assert_items(response.json())
+    [(method, endpoint, queries)] = recorded_queries
+    assert (method, endpoint) == ("GET", "/api/v1/orders/")
+    assert queries.count == READ_STATEMENTS
+    assert set(queries.by_type) == {"select"}
+
+
+def test_single_order_statements(run, client, headers, order_ids, recorded_queries):
+    response = run(client.get(f"/api/v1/orders/{order_ids[0]}", headers=headers))
+
+    assert response.status_code == 200, response.text
+    assert_items([response.json()])
+    [(method, endpoint, queries)] = recorded_queries
+    assert (method, endpoint) == ("GET", "/api/v1/orders/{id}")
+    assert queries.count == READ_STATEMENTS
@@ -0,0 +1,201 @@
+"""
+Query-plan regression check: every endpoint statement must use an index.
+
+Seeds a large dataset (products with inventory, many customers with orders
+and items), runs ANALYZE, then calls each endpoint once while capturing the
+SQL it executes and EXPLAINs every captured statement with its parameters.
+A statement fails when its plan reads one of the large tables in full:
+
+* PostgreSQL: a ``Seq Scan``, or an index scan with no index condition that
+  only filters rows (a full scan in index order);
+* SQLite: a ``SCAN`` step without ``USING ... INDEX``.
+
+List endpoints are called with a cursor, their hot path; the exports are
+left out, since they read whole tables by design.
+"""
+import json
+import re
+import uuid
+from typing import NamedTuple
+
+import pytest
+
+from benchmarks.common import seed_orders, seed_products
+
+PRODUCTS = 100000
+CUSTOMERS = 2000
+ORDERS_PER_CUSTOMER = 20
+ITEMS = 3
+
+# Tabelas grandes: nenhum plano pode lê-las inteiras
+LARGE_TABLES = {"products", "inventory_items", "orders", "order_items"}
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)(?!.*USING)")
+
+
+class Dataset(NamedTuple):
+    product_ids: list
+    order_ids: list
+
+
+def seed_customers(count: int, prefix: str) -> list:
+    from sqlalchemy import insert, select
+
+    from app.db.database import engine
+    from app.db.models import User
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"{prefix}-{i}@example.com", "hashed_password": "!", "full_name": "Plan", "is_active": True}
+            for i in range(count)
+        ])
+        return list(conn.execute(select(User.id).where(User.email.like(f"{prefix}-%"))).scalars())
+
+
+def analyze() -> None:
+    from sqlalchemy import text
+
+    from app.db.database import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+
+def plan_problems(dialect: str, plan) -> list:
+    """Plan steps that read a large table in full."""
+    problems = []
+    if dialect == "sqlite":
+        for row in plan:
+            match = SQLITE_FULL_SCAN.match(row[-1])
+            if match and match.group(1) in LARGE_TABLES:
+                problems.append(row[-1])
+        return problems
+
+    def walk(node):
+        relation = node.get("Relation Name")
+        if relation in LARGE_TABLES:
+            if node["Node Type"] == "Seq Scan":
+                problems.append(f"Seq Scan on {relation}")
+            elif node["Node Type"] in ("Index Scan", "Index Only Scan") \
+                    and "Index Cond" not in node and "Filter" in node:
+                problems.append(f"{node['Node Type']} on {relation} without index condition ({node['Filter']})")
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return problems
+
+
+def explainable(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper()
+    if head == "INSERT":
+        # INSERT ... VALUES não lê tabelas; INSERT ... SELECT sim
+        return " SELECT " in statement.upper()
+    return head in ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+async def explain(engine, statement: str, parameters):
+    """Plan of a captured statement, through the kind of engine (sync/async) that ran it."""
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    dialect = engine.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN (FORMAT JSON) "
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as conn:
+            rows = (await conn.exec_driver_sql(prefix + statement, parameters)).all()
+    else:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    if dialect == "sqlite":
+        return rows
+    plan = rows[0][0]
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+@pytest.fixture(scope="module")
+def dataset(run, client, headers) -> Dataset:
+    from sqlalchemy import select
+
+    from app.db.database import engine
+    from app.db.models import Order
+
+    user_id = int(headers["X-User-Id"])
+    product_ids = seed_products(PRODUCTS, user_id, with_inventory=1000)
+    customer_ids = seed_customers(CUSTOMERS, uuid.uuid4().hex[:8]) + [user_id]
+    seed_orders(customer_ids, product_ids, ORDERS_PER_CUSTOMER, ITEMS)
+    analyze()
+    with engine.connect() as conn:
+        order_ids = conn.execute(
+            select(Order.id).where(Order.customer_id == user_id).order_by(Order.id)
+        ).scalars().all()
+    # Aquece os caches de token/usuário: só as instruções dos handlers são capturadas
+    run(client.get("/api/v1/orders/", params={"limit": 1}, headers=headers))
+    return Dataset(product_ids, order_ids)
+
+
+@pytest.fixture
+def captured():
+    """Statements executed during the test: (engine that ran it, SQL, parameters)."""
+    from sqlalchemy import event
+
+    from app.db.database import async_engine, engine
+
+    statements = []
+    sources = [(engine, engine)]
+    if async_engine is not None:
+        sources.append((async_engine.sync_engine, async_engine))
+    listeners = []
+    for target, runner in sources:
+        def capture(conn, cursor, statement, parameters, context, executemany, runner=runner):
+            if not executemany:
+                statements.append((runner, statement, parameters))
+        event.listen(target, "before_cursor_execute", capture)
+        listeners.append((target, capture))
+    yield statements
+    for target, capture in listeners:
+        event.remove(target, "before_cursor_execute", capture)
+
+
+def _middle(data: Dataset) -> int:
+    return data.product_ids[len(data.product_ids) // 2]
+
+
+def _cursor(value: int) -> str:
+    from app.api.pagination import encode_cursor
+
+    return encode_cursor(value)
+
+
+# Na ordem: as escritas que mudam os dados vêm por último
+REQUESTS = {
+    "read_products": lambda d: ("GET", "/api/v1/products/", {"params": {"cursor": _cursor(_middle(d))}}),
+    "read_product": lambda d: ("GET", f"/api/v1/products/{_middle(d)}", {}),
+    "update_product": lambda d: ("PUT", f"/api/v1/products/{_middle(d)}", {"json": {"price": 12.5}}),
+    "read_inventory": lambda d: ("GET", "/api/v1/inventory/", {"params": {"cursor": _cursor(_middle(d))}}),
+    "add_to_inventory": lambda d: ("POST", "/api/v1/inventory/add", {"json": {"product_id": _middle(d), "quantity": 5}}),
+    "remove_from_inventory": lambda d: (
+        "POST", "/api/v1/inventory/remove", {"json": {"product_id": _middle(d), "quantity": 1}}
+    ),
+    "read_orders": lambda d: ("GET", "/api/v1/orders/", {"params": {"limit": 20}}),
+    "read_orders cursor": lambda d: ("GET", "/api/v1/orders/", {"params": {"cursor": _cursor(d.order_ids[0])}}),
+    "read_order": lambda d: ("GET", f"/api/v1/orders/{d.order_ids[-1]}", {}),
+    "create_order": lambda d: ("POST", "/api/v1/orders/", {"json": {"items": [
+        {"product_id": product_id, "quantity": 1, "unit_price": 10.0} for product_id in d.product_ids[:3]
+    ]}}),
+    "delete_product": lambda d: ("DELETE", f"/api/v1/products/{d.product_ids[-1]}", {}),
+}
+
+
+@pytest.mark.parametrize("name", list(REQUESTS))
+def test_statements_use_indexes(run, client, headers, dataset, captured, name):
+    method, path, kwargs = REQUESTS[name](dataset)
+    response = run(client.request(method, path, headers=headers, **kwargs))
+    assert response.status_code == 200, response.text
+
+    statements = [item for item in captured if explainable(item[1])]
+    assert statements
+    problems = []
+    for runner, statement, parameters in statements:
+        for problem in plan_problems(runner.dialect.name, run(explain(runner, statement, parameters))):
+            problems.append(f"{problem}: {' '.join(statement.split())[:160]}")
+    assert not problems